@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Page Asset Store
+Content-addressed storage for the scripts, stylesheets, images and other files referenced by
+saved HTML pages. Each blob is named by the SHA-256 of its bytes, so a bundle shared by every
+page (or served under two URLs) is stored once, and each URL is fetched at most once per run
+no matter how many pages or elements reference it. Pages point into the store directly.
+Blobs are streamed to a temporary file, hashed on the way, and renamed into place.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.json"
+
+class AssetStore:
+    """SHA-256 keyed blob directory with a per-run URL map"""
+
+    def __init__(self, root, on_reuse=None):
+        self.root = Path(root)
+        # Called with each URL answered from an earlier fetch instead of the network
+        self.on_reuse = on_reuse
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # URL -> future of its blob name, so concurrent references share one fetch
+        self._by_url = {}
+        # Blob name -> size in bytes
+        self._sizes = {}
+        self.stats = {
+            "references": 0, "fetches": 0, "failed": 0, "blobs_written": 0,
+            "same_content": 0, "bytes_downloaded": 0, "bytes_written": 0, "bytes_not_refetched": 0
+        }
+
+    def blob_name(self, digest, extension):
+        """Path of a blob below the store root; the extension is kept so saved pages open from disk"""
+        if not extension.isalnum() or len(extension) > 5:
+            extension = "bin"
+        return f"{digest[:2]}/{digest}.{extension}"
+
+    def get(self, url, fetch, extension="bin"):
+        """Blob name holding url's content, fetched on first use
+
+        fetch(url, path) writes the body to path and returns at least its "sha256" and "bytes".
+        """
+        with self._lock:
+            self.stats["references"] += 1
+            future = self._by_url.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._by_url[url] = future
+        if not owner:
+            name = future.result()
+            if name is None:
+                raise ValueError(f"Earlier fetch of {url} failed")
+            with self._lock:
+                self.stats["bytes_not_refetched"] += self._sizes[name]
+            if self.on_reuse is not None:
+                self.on_reuse(url)
+            return name
+
+        # Unique per fetch; the blob's name is only known once the body has been hashed
+        temp = self.root / f".fetch-{threading.get_ident()}-{id(future)}"
+        try:
+            name = self.put(temp, fetch(url, temp), extension)
+        except Exception:
+            temp.unlink(missing_ok=True)
+            with self._lock:
+                self.stats["failed"] += 1
+            future.set_result(None)
+            raise
+        future.set_result(name)
+        return name
+
+    def put(self, temp, result, extension="bin"):
+        """Move a fetched file into the store under its digest, unless an identical blob exists"""
+        name = self.blob_name(result["sha256"], extension)
+        path = self.root / name
+        with self._lock:
+            self.stats["fetches"] += 1
+            self.stats["bytes_downloaded"] += result["bytes"]
+            known = name in self._sizes
+            self._sizes[name] = result["bytes"]
+        if known or path.exists():
+            temp.unlink(missing_ok=True)
+            with self._lock:
+                self.stats["same_content"] += 1
+            return name
+
+        path.parent.mkdir(exist_ok=True)
+        # Renaming within the store is atomic, so a reader never sees a partial blob
+        os.replace(temp, path)
+        with self._lock:
+            self.stats["blobs_written"] += 1
+            self.stats["bytes_written"] += result["bytes"]
+        return name
+
+    def save_index(self):
+        """Write the URL -> blob map of this run next to the blobs"""
+        index = {url: future.result() for url, future in self._by_url.items() if future.done() and future.result()}
+        with open(self.root / INDEX_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+
+    def summary(self):
+        return {**self.stats, "urls": len(self._by_url), "blobs": len(self._sizes)}
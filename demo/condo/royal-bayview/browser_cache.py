@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Browser Caches
+BrowserCache: a size-bounded persistent Chromium profile per site, so hashed Nuxt bundles, fonts
+and Contentful images downloaded by one crawl are served from the HTTP disk cache on every later
+page and run. Cache hits are metered through the Chrome DevTools Protocol and appended to a
+per-site history, giving run-over-run hit rates and the bytes the cache kept off the network.
+Playwright bypasses the HTTP cache for routed requests, so pages using it must not be routed.
+
+ResponseMemo: an in-process LRU of immutable, content-hashed responses served from a browser
+context's route handler, so the pages of one crawl never fetch the same bundle twice.
+"""
+
+import asyncio
+import json
+import re
+import shutil
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILENAME = "cache_stats.json"
+
+# Profile directories Chromium fills with cached responses and compiled scripts
+CACHE_SUBDIRS = [Path("Default") / "Cache", Path("Default") / "Code Cache"]
+
+# Runs kept in the history file
+MAX_HISTORY = 50
+
+# Request types whose content-hashed URLs never change content
+MEMO_RESOURCE_TYPES = {"script", "stylesheet", "image", "font"}
+
+# A path segment or file name part that is a hex content hash, e.g. _nuxt/109bf8c.js or the
+# 32-digit hash in a Contentful asset URL; pure-digit ids such as listing numbers do not count
+HASHED_URL_RE = re.compile(r'(?:^|[/.\-_])(?=[0-9a-f]*[a-f])(?=[0-9a-f]*\d)[0-9a-f]{7,64}(?=[/.\-_]|$)', re.I)
+
+# Headers that describe the original transfer rather than the body being replayed
+TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+class BrowserCache:
+    """Persistent profile directory for one site plus its cache hit meter"""
+
+    def __init__(self, root, site_url, max_mb=500):
+        site = re.sub(r'[^\w.-]', '_', urlparse(site_url).netloc) or "default"
+        self.profile_dir = Path(root) / site
+        self.max_bytes = max_mb * 1024 * 1024
+        self.history_file = self.profile_dir / HISTORY_FILENAME
+        self.history = self.load_history()
+        # Last size fetched from the network for each URL, to price a later cache hit
+        self.sizes = self.history.get("sizes", {})
+        self.stats = {"responses": 0, "hits": 0, "bytes_avoided": 0, "bytes_downloaded": 0}
+        self.last_run = None
+
+    def load_history(self):
+        if self.history_file.exists():
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache history {self.history_file}: {e}")
+        return {"runs": [], "sizes": {}}
+
+    def launch_options(self):
+        """Arguments for chromium.launch_persistent_context on this site's profile"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        return {
+            "user_data_dir": str(self.profile_dir),
+            # Chromium evicts least recently used entries itself once the cache reaches this size
+            "args": [f"--disk-cache-size={self.max_bytes}"]
+        }
+
+    async def meter(self, context, page):
+        """Count the page's cache hits and network bytes from DevTools network events"""
+        session = await context.new_cdp_session(page)
+        responses = {}
+
+        def on_response(params):
+            response = params["response"]
+            responses[params["requestId"]] = {
+                "url": response["url"],
+                "cached": bool(response.get("fromDiskCache") or response.get("fromPrefetchCache")),
+                "length": response.get("headers", {}).get("content-length")
+                          or response.get("headers", {}).get("Content-Length")
+            }
+
+        def on_served_from_cache(params):
+            responses.setdefault(params["requestId"], {"url": None, "cached": True, "length": None})["cached"] = True
+
+        def on_finished(params):
+            response = responses.pop(params["requestId"], None)
+            if response is None:
+                return
+            self.stats["responses"] += 1
+            if response["cached"]:
+                self.stats["hits"] += 1
+                known = self.sizes.get(response["url"]) or response["length"] or 0
+                self.stats["bytes_avoided"] += int(known)
+            else:
+                size = int(params.get("encodedDataLength", 0))
+                self.stats["bytes_downloaded"] += size
+                if response["url"]:
+                    self.sizes[response["url"]] = size
+
+        session.on("Network.responseReceived", on_response)
+        session.on("Network.requestServedFromCache", on_served_from_cache)
+        session.on("Network.loadingFinished", on_finished)
+        await session.send("Network.enable")
+
+    def disk_usage(self):
+        return sum(path.stat().st_size for path in self.profile_dir.rglob('*') if path.is_file())
+
+    def enforce_limit(self):
+        """Drop the cache directories if the profile has outgrown the limit (e.g. after a flag change)"""
+        usage = self.disk_usage()
+        # Chromium's own eviction keeps the HTTP cache near max_bytes; allow headroom for the rest
+        if usage > self.max_bytes * 1.2:
+            for subdir in CACHE_SUBDIRS:
+                shutil.rmtree(self.profile_dir / subdir, ignore_errors=True)
+            logger.info(f"Browser cache {self.profile_dir} was {usage / 1048576:.0f} MB; cleared it")
+            usage = self.disk_usage()
+        return usage
+
+    def finish_run(self):
+        """Append this run's figures to the site's history and return them"""
+        usage = self.enforce_limit()
+        run = {
+            "date": datetime.now().isoformat(),
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / self.stats["responses"], 3) if self.stats["responses"] else 0,
+            "cache_bytes": usage
+        }
+        previous = self.history["runs"][-1] if self.history["runs"] else None
+        self.history["runs"] = (self.history["runs"] + [run])[-MAX_HISTORY:]
+        self.history["sizes"] = self.sizes
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.history_file, 'w', encoding='utf-8') as f:
+            json.dump(self.history, f, indent=2, ensure_ascii=False)
+        self.last_run = run
+
+        logger.info(f"Browser cache: {run['hits']}/{run['responses']} responses from cache "
+                    f"({run['hit_rate']:.0%}), ~{run['bytes_avoided'] / 1024:.0f} KB avoided, "
+                    f"{run['bytes_downloaded'] / 1024:.0f} KB downloaded, cache {usage / 1048576:.1f} MB")
+        if previous:
+            logger.info(f"Previous run: {previous['hits']}/{previous['responses']} from cache "
+                        f"({previous['hit_rate']:.0%}), ~{previous['bytes_avoided'] / 1024:.0f} KB avoided")
+        return run
+
+def is_immutable_url(url):
+    """Does the URL embed a content hash, so its response can be reused for the whole crawl?"""
+    return bool(HASHED_URL_RE.search(urlparse(url).path))
+
+class ResponseMemo:
+    """LRU of immutable responses, served from a context route handler under a byte cap"""
+
+    def __init__(self, max_mb=64):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # URL -> (status, headers, body), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # URL -> future of the entry being fetched, so concurrent pages share one request
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_served": 0}
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def put(self, url, entry):
+        size = len(entry[2])
+        # One oversized response would flush everything else
+        if size > self.max_bytes // 4 or url in self._entries:
+            return
+        self._entries[url] = entry
+        self._bytes += size
+        self.stats["stored"] += 1
+        while self._bytes > self.max_bytes:
+            _, (_, _, body) = self._entries.popitem(last=False)
+            self._bytes -= len(body)
+            self.stats["evicted"] += 1
+
+    async def serve(self, route, entry):
+        status, headers, body = entry
+        self.stats["hits"] += 1
+        self.stats["bytes_served"] += len(body)
+        await route.fulfill(status=status, headers=headers, body=body)
+
+    async def handle(self, route):
+        """Context route handler: memoized URLs are answered from memory, the rest fall through"""
+        request = route.request
+        url = request.url
+        if request.method != "GET" or request.resource_type not in MEMO_RESOURCE_TYPES or not is_immutable_url(url):
+            await route.fallback()
+            return
+
+        entry = self.get(url)
+        if entry is not None:
+            await self.serve(route, entry)
+            return
+        if url in self._inflight:
+            entry = await self._inflight[url]
+            if entry is not None:
+                await self.serve(route, entry)
+            else:
+                await route.fallback()
+            return
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        entry = None
+        try:
+            response = await route.fetch()
+            body = await response.body()
+            headers = {name: value for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS}
+            if response.status == 200 and "no-store" not in headers.get("cache-control", ""):
+                entry = (response.status, headers, body)
+                self.put(url, entry)
+            await route.fulfill(status=response.status, headers=headers, body=body)
+        except Exception as e:
+            logger.debug(f"Response memo could not serve {url}: {e}")
+            try:
+                # Let the browser make the request itself
+                await route.fallback()
+            except Exception:
+                # Already answered, or the page has closed
+                pass
+        finally:
+            future.set_result(entry)
+            del self._inflight[url]
+
+    def summary(self):
+        return {**self.stats, "entries": len(self._entries), "bytes_held": self._bytes}
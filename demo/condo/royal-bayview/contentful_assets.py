@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Contentful Asset Identity
+Contentful serves one uploaded asset under many URLs: the same
+//images.ctfassets.net/<space>/<asset id>/<file token>/<file name> path with different
+image API parameters (w, h, fm, q, fit, fl) or cache-busters. This module resolves each URL to
+the asset it shows, collapses the variants of one asset into a single media entry and keeps the
+best rendition, so the extractor lists and the downloader fetches each asset once.
+Other URLs are identified by their canonical form. rendition_url() asks the Images API for an
+exact size and format, so images are resized by Contentful instead of locally.
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from crawl_frontier import canonicalize_url
+
+CONTENTFUL_HOSTS = {"images.ctfassets.net", "videos.ctfassets.net", "assets.ctfassets.net",
+                    "downloads.ctfassets.net"}
+
+def parse_contentful_url(url):
+    """Split a Contentful asset URL into its ids and image API parameters, or None for other URLs"""
+    parts = urlsplit(url if "://" in url else "https:" + url)
+    if parts.hostname not in CONTENTFUL_HOSTS:
+        return None
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if len(segments) < 4:
+        return None
+    space_id, asset_id, token = segments[:3]
+    return {
+        "space_id": space_id,
+        "asset_id": asset_id,
+        "token": token,
+        "file_name": "/".join(segments[3:]),
+        "params": dict(parse_qsl(parts.query))
+    }
+
+def asset_key(url):
+    """Identity shared by every variant of one asset"""
+    contentful = parse_contentful_url(url)
+    if contentful is not None:
+        # The file token changes when a new file is uploaded, so it is part of the identity
+        return f"contentful:{contentful['space_id']}/{contentful['asset_id']}/{contentful['token']}"
+    return canonicalize_url(url)
+
+def rendition_rank(url):
+    """Higher is better: the original file beats any resize, then larger pixel area wins"""
+    contentful = parse_contentful_url(url)
+    if contentful is None:
+        return (1, 0)
+    params = contentful["params"]
+    if "w" not in params and "h" not in params:
+        return (1, 0)
+    try:
+        return (0, int(params.get("w", 0) or 0) * int(params.get("h", 0) or params.get("w", 0) or 0))
+    except ValueError:
+        return (0, 0)
+
+def collapse_variants(items):
+    """Merge media entries that show the same asset, keeping first-seen order
+
+    Each merged entry keeps the best rendition as its url, the first useful alt text and
+    category, and lists every URL it was seen under in "variants".
+    """
+    merged = {}
+    for item in items:
+        url = item.get("url", "")
+        if not url:
+            continue
+        key = asset_key(url)
+        if key not in merged:
+            merged[key] = {**item, "asset_key": key, "variants": [url]}
+            continue
+
+        entry = merged[key]
+        if url not in entry["variants"]:
+            entry["variants"].append(url)
+        if rendition_rank(url) > rendition_rank(entry["url"]):
+            entry["url"] = url
+        for field, empty in (("alt", ""), ("title", ""), ("category", "general")):
+            if entry.get(field, empty) == empty and item.get(field, empty) != empty:
+                entry[field] = item[field]
+    return list(merged.values())
+
+def rendition_url(url, params):
+    """URL of a Contentful image resized and encoded by the Images API (w, h, fit, fm, q, fl)"""
+    parts = urlsplit(url if "://" in url else "https:" + url)
+    # fl=progressive is only valid for JPEG output
+    if params.get("fl") == "progressive" and params.get("fm") != "jpg":
+        params = {key: value for key, value in params.items() if key != "fl"}
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
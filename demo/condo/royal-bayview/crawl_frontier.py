@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Royal Bayview Crawl Frontier
+Priority queue of pages still to crawl for one project, shared by the content extractor and the
+media downloader. URLs are deduplicated on a canonical form, kept inside the project's scope
+(the directory of its landing page) and bounded by crawl depth and a page budget.
+Seeds come from the landing page's links and the site's sitemap.xml, so a new project only
+needs its landing page URL.
+"""
+
+import heapq
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "_ga", "_gl"}
+TRACKING_PREFIXES = ("utm_",)
+
+# Links to files rather than pages; media and documents are collected separately
+NON_PAGE_EXTENSIONS = {
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".mp4", ".mov", ".webm",
+    ".zip", ".css", ".js", ".json", ".xml", ".txt"
+}
+
+# Sitemaps listed by a sitemap index that are followed at most
+MAX_CHILD_SITEMAPS = 20
+
+def canonicalize_url(url):
+    """Normalize a URL so the variants of one page compare equal
+
+    Lowercases scheme and host, drops default ports, fragments, tracking parameters,
+    duplicate slashes, dot segments, index.html and trailing slashes, and sorts the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    path = posixpath.normpath(path) if path != "/" else path
+    if path.endswith("/index.html") or path == "index.html":
+        path = path[:-len("index.html")]
+    path = path.rstrip("/") or "/"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+class FrontierEntry:
+    """A page waiting to be crawled: the URL to fetch, its canonical key and crawl depth"""
+
+    def __init__(self, url, key, depth, priority, source):
+        self.url = url
+        self.key = key
+        self.depth = depth
+        self.priority = priority
+        self.source = source
+
+    def __repr__(self):
+        return f"FrontierEntry({self.url!r}, depth={self.depth})"
+
+class CrawlFrontier:
+    """Breadth-first crawl queue with canonical-URL dedupe and one visited set"""
+
+    def __init__(self, scope_url, max_depth=3, max_pages=200):
+        # Pages are in scope when they live under the landing page's directory
+        scope = canonicalize_url(urljoin(scope_url, "."))
+        self.scope = scope if scope.endswith("/") else scope + "/"
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self._heap = []
+        self._counter = 0
+        # Canonical keys queued or visited, so each page is queued once
+        self._seen = set()
+        # Canonical key -> URL of every page handed out for crawling
+        self.visited = {}
+        self.skipped = {"out_of_scope": 0, "not_a_page": 0, "too_deep": 0, "duplicate": 0, "over_budget": 0}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def in_scope(self, url):
+        key = canonicalize_url(url)
+        return key.startswith(self.scope) or key + "/" == self.scope
+
+    def relative_path(self, url):
+        """Path of url below the project scope ("" for the landing page)"""
+        key = canonicalize_url(url)
+        return key[len(self.scope):] if key.startswith(self.scope) else ""
+
+    def add(self, url, depth, priority=0.5, source="link"):
+        """Queue url unless it is out of scope, too deep, not a page or already seen"""
+        url = urlsplit(url)._replace(fragment="").geturl()
+        if urlsplit(url).scheme not in DEFAULT_PORTS or not self.in_scope(url):
+            self.skipped["out_of_scope"] += 1
+            return False
+        if posixpath.splitext(urlsplit(url).path)[1].lower() in NON_PAGE_EXTENSIONS:
+            self.skipped["not_a_page"] += 1
+            return False
+        if depth > self.max_depth:
+            self.skipped["too_deep"] += 1
+            return False
+
+        key = canonicalize_url(url)
+        if key in self._seen:
+            self.skipped["duplicate"] += 1
+            return False
+        self._seen.add(key)
+
+        # Shallow pages first, then higher sitemap priority, then discovery order
+        self._counter += 1
+        heapq.heappush(self._heap, (depth, -priority, self._counter, FrontierEntry(url, key, depth, priority, source)))
+        return True
+
+    def add_links(self, urls, parent):
+        """Queue the links found on a crawled page one level below it"""
+        added = 0
+        for url in urls:
+            if url and self.add(urljoin(parent.url, url), parent.depth + 1):
+                added += 1
+        return added
+
+    def mark_visited(self, url):
+        """Record a page crawled outside the queue, such as the landing page"""
+        key = canonicalize_url(url)
+        self._seen.add(key)
+        self.visited.setdefault(key, url)
+
+    def is_visited(self, url):
+        return canonicalize_url(url) in self.visited
+
+    def pop(self):
+        """Next page to crawl, or None when the queue is empty or the page budget is spent"""
+        if not self._heap:
+            return None
+        if len(self.visited) >= self.max_pages:
+            self.skipped["over_budget"] += len(self._heap)
+            self._heap = []
+            return None
+        entry = heapq.heappop(self._heap)[-1]
+        self.visited[entry.key] = entry.url
+        return entry
+
+    def pop_batch(self, size=None):
+        """Up to size pages (all queued pages by default) in crawl order"""
+        batch = []
+        while size is None or len(batch) < size:
+            entry = self.pop()
+            if entry is None:
+                break
+            batch.append(entry)
+        return batch
+
+    def seed_from_sitemap(self, fetch, sitemap_url=None):
+        """Queue the in-scope pages listed in the site's sitemap.xml (and any sitemap index children)
+
+        fetch(url) returns the sitemap's text, or None when it cannot be fetched.
+        """
+        parts = urlsplit(self.scope)
+        pending = [sitemap_url or f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+        followed = 0
+        added = 0
+        while pending and followed <= MAX_CHILD_SITEMAPS:
+            url = pending.pop(0)
+            followed += 1
+            text = fetch(url)
+            if not text:
+                continue
+            try:
+                root = ET.fromstring(text.encode("utf-8") if isinstance(text, str) else text)
+            except ET.ParseError as e:
+                logger.warning(f"Ignoring unparsable sitemap {url}: {e}")
+                continue
+
+            # Sitemaps are namespaced; match on local tag names
+            if root.tag.endswith("sitemapindex"):
+                pending += [loc.text.strip() for loc in root.iter() if loc.tag.endswith("loc") and loc.text]
+                continue
+            for entry in root:
+                fields = {child.tag.rsplit("}", 1)[-1]: (child.text or "").strip() for child in entry}
+                if not fields.get("loc"):
+                    continue
+                try:
+                    priority = float(fields.get("priority", 0.5))
+                except ValueError:
+                    priority = 0.5
+                if self.add(fields["loc"], 1, priority, source="sitemap"):
+                    added += 1
+
+        logger.info(f"Sitemap seeded {added} pages in scope {self.scope}")
+        return added
+
+    def stats(self):
+        return {
+            "scope": self.scope,
+            "visited": len(self.visited),
+            "pending": len(self._heap),
+            "skipped": dict(self.skipped)
+        }
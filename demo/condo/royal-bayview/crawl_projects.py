@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Multi-Project Crawl Scheduler
+Crawls a batch of builder projects concurrently. All projects share one long-lived Chromium,
+each in its own isolated browser context, and every request goes through per-host politeness
+limits under a global concurrency cap. Reports each project's result and the batch wall time.
+
+Projects are listed in a JSON file:
+    [
+        {"name": "royal-bayview", "base_url": "https://www.tridel.com/royalbayview/"},
+        {"name": "sunset-views", "base_url": "https://www.sunsetdevelopments.com/projects/sunset-views/",
+         "backend": "http", "max_pages": 50}
+    ]
+Any other RoyalBayviewExtractor argument (concurrency, max_depth, incremental, ...) may be given
+per project; output goes to <output_root>/<name> unless output_dir is set.
+"""
+
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+import time
+import logging
+
+from extract_website_content import RoyalBayviewExtractor, async_playwright
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class HostRateLimiter:
+    """Per-host politeness (concurrent requests and spacing between them) under a global cap"""
+
+    def __init__(self, host_concurrency=2, host_interval=0.5, global_limit=8):
+        self.host_concurrency = host_concurrency
+        # Minimum seconds between the starts of two requests to the same host
+        self.host_interval = host_interval
+        self._global = asyncio.Semaphore(global_limit)
+        self._host_slots = {}
+        self._host_locks = {}
+        self._next_start = {}
+        # Host -> {"requests", "waited_s"}
+        self.stats = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.host_concurrency)
+            self._host_locks[host] = asyncio.Lock()
+            self._next_start[host] = 0
+            self.stats[host] = {"requests": 0, "waited_s": 0.0}
+
+        loop = asyncio.get_running_loop()
+        queued = loop.time()
+        # Take the host slot before the global one so a busy host never holds global capacity
+        async with self._host_slots[host]:
+            async with self._host_locks[host]:
+                delay = self._next_start[host] - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._next_start[host] = loop.time() + self.host_interval
+            async with self._global:
+                self.stats[host]["requests"] += 1
+                self.stats[host]["waited_s"] += loop.time() - queued
+                yield
+
+class CrawlScheduler:
+    def __init__(self, projects, output_root="output/projects", max_projects=4, global_limit=8,
+                 host_concurrency=2, host_interval=0.5):
+        self.projects = projects
+        self.output_root = Path(output_root)
+        # Projects crawled at the same time; each one runs its own pages in parallel too
+        self.max_projects = max_projects
+        self.limiter_options = {
+            "host_concurrency": host_concurrency,
+            "host_interval": host_interval,
+            "global_limit": global_limit
+        }
+        self.results = []
+        self.report = {}
+
+    def build_extractor(self, project, browser, limiter):
+        options = {key: value for key, value in project.items() if key != "name"}
+        options.setdefault("output_dir", self.output_root / project["name"])
+        return RoyalBayviewExtractor(browser=browser, politeness=limiter, **options)
+
+    def needs_browser(self):
+        return async_playwright is not None and any(project.get("backend", "auto") != "http"
+                                                     for project in self.projects)
+
+    async def run(self):
+        """Crawl every project and return the batch report"""
+        start = time.perf_counter()
+        limiter = HostRateLimiter(**self.limiter_options)
+        logger.info(f"Crawling {len(self.projects)} projects, {self.max_projects} at a time")
+
+        if self.needs_browser():
+            async with async_playwright() as p:
+                # One browser for the whole batch; each project gets its own context
+                launch_start = time.perf_counter()
+                browser = await p.chromium.launch(headless=True)
+                launch_s = time.perf_counter() - launch_start
+                try:
+                    await self.crawl_all(browser, limiter)
+                finally:
+                    await browser.close()
+        else:
+            launch_s = None
+            await self.crawl_all(None, limiter)
+
+        self.report = {
+            "batch_date": datetime.now().isoformat(),
+            "wall_time_s": round(time.perf_counter() - start, 3),
+            "browser_launches": 0 if launch_s is None else 1,
+            "browser_launch_s": None if launch_s is None else round(launch_s, 3),
+            "projects": self.results,
+            "hosts": limiter.stats
+        }
+        return self.report
+
+    async def crawl_all(self, browser, limiter):
+        slots = asyncio.Semaphore(self.max_projects)
+        self.results = await asyncio.gather(*(self.crawl_project(project, browser, limiter, slots)
+                                              for project in self.projects))
+
+    async def crawl_project(self, project, browser, limiter, slots):
+        """Crawl one project; a failure is reported without stopping the rest of the batch"""
+        async with slots:
+            start = time.perf_counter()
+            result = {"name": project["name"], "base_url": project["base_url"]}
+            logger.info(f"[{project['name']}] crawl started")
+            try:
+                extractor = self.build_extractor(project, browser, limiter)
+                await extractor.extract_website_content()
+                extractor.save_results()
+                result["status"] = extractor.extracted_data["extraction_completeness"]
+                result["pages"] = extractor.run_stats["pages"]
+                result["output_dir"] = str(extractor.output_dir)
+            except Exception as e:
+                logger.error(f"[{project['name']}] crawl failed: {e}")
+                result["status"] = "failed"
+                result["error"] = str(e)
+            result["wall_time_s"] = round(time.perf_counter() - start, 3)
+            logger.info(f"[{project['name']}] {result['status']} in {result['wall_time_s']} s")
+            return result
+
+    def save_report(self):
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        report_file = self.output_root / "batch_report.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Batch report saved to {report_file}")
+
+def load_projects(path):
+    """Read the project list, checking every entry names a project and its landing page"""
+    with open(path, 'r', encoding='utf-8') as f:
+        projects = json.load(f)
+    for project in projects:
+        if not project.get("name") or not project.get("base_url"):
+            raise ValueError(f"Project entries need a name and a base_url: {project}")
+    return projects
+
+async def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Crawl many builder projects with one shared browser")
+    parser.add_argument("projects", help="JSON file listing the projects to crawl")
+    parser.add_argument("--output-root", default="output/projects")
+    parser.add_argument("--max-projects", type=int, default=4, help="projects crawled at the same time")
+    parser.add_argument("--global-limit", type=int, default=8, help="requests in flight across all projects")
+    parser.add_argument("--host-concurrency", type=int, default=2, help="requests in flight per host")
+    parser.add_argument("--host-interval", type=float, default=0.5, help="seconds between requests to one host")
+    args = parser.parse_args()
+
+    scheduler = CrawlScheduler(load_projects(args.projects), output_root=args.output_root,
+                               max_projects=args.max_projects, global_limit=args.global_limit,
+                               host_concurrency=args.host_concurrency, host_interval=args.host_interval)
+    report = await scheduler.run()
+    scheduler.save_report()
+
+    print("\n" + "=" * 60)
+    print("PROJECT CRAWL SUMMARY")
+    print("=" * 60)
+    for result in report["projects"]:
+        print(f"{result['name']:<30} {result['status']:<10} {result['wall_time_s']:>8} s")
+    print("-" * 60)
+    print(f"Batch wall time: {report['wall_time_s']} s, browser launches: {report['browser_launches']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Royal Bayview Crawl Trace
+Timed spans for every step of a crawl, saved in the Chrome trace event format so a run can be
+opened as a waterfall in Perfetto (ui.perfetto.dev) or chrome://tracing, plus a per-run summary.
+
+Spans are laid out on lanes: each pooled browser page gets its own lane, and HTTP fetches run
+in worker threads show up on one lane per thread.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Lane of the running asyncio task; None falls back to the current thread's name
+_current_lane = contextvars.ContextVar("crawl_trace_lane", default=None)
+
+def percentile(values, pct, default=None):
+    """Nearest-rank percentile of a list of numbers, or default for an empty list
+
+    The smallest value with at least pct% of the values at or below it. Shared by every run
+    report (crawl trace, extraction stats, download metrics) so their figures agree.
+    """
+    if not values:
+        return default
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[rank - 1]
+
+class CrawlTrace:
+    """Collects complete ("X") and counter ("C") trace events for one run"""
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def _now_us(self):
+        return round((time.perf_counter() - self._origin) * 1_000_000)
+
+    def _lane_id(self):
+        name = _current_lane.get() or threading.current_thread().name
+        with self._lock:
+            if name not in self._lanes:
+                self._lanes[name] = len(self._lanes) + 1
+                self.events.append({
+                    "name": "thread_name", "ph": "M", "pid": 1, "tid": self._lanes[name],
+                    "args": {"name": name}
+                })
+            return self._lanes[name]
+
+    @contextmanager
+    def lane(self, name):
+        """Put every span opened inside this block (in this task) on the named lane"""
+        token = _current_lane.set(name)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    @contextmanager
+    def span(self, name, cat, **args):
+        """Time the enclosed block; the yielded args dict may be filled in before it closes"""
+        tid = self._lane_id()
+        start = self._now_us()
+        try:
+            yield args
+        finally:
+            self.add_span(name, cat, start, self._now_us() - start, tid=tid, **args)
+
+    def add_span(self, name, cat, start_us, dur_us, tid=None, **args):
+        """Record a span measured elsewhere, e.g. inside the page"""
+        event = {
+            "name": name, "cat": cat, "ph": "X", "pid": 1,
+            "tid": tid if tid is not None else self._lane_id(),
+            "ts": start_us, "dur": max(0, dur_us), "args": args
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def counter(self, name, **values):
+        """Record the current value of one or more running totals"""
+        with self._lock:
+            self.events.append({"name": name, "ph": "C", "pid": 1, "tid": 0, "ts": self._now_us(), "args": values})
+
+    def now_us(self):
+        """Microseconds since the trace started, for use with add_span"""
+        return self._now_us()
+
+    def summary(self):
+        """Count, total and p50/p95/max duration (ms) per span name, slowest total first"""
+        by_name = {}
+        for event in self.events:
+            if event["ph"] == "X":
+                by_name.setdefault((event["cat"], event["name"]), []).append(event["dur"] / 1000)
+
+        rows = []
+        for (cat, name), durations in by_name.items():
+            rows.append({
+                "cat": cat,
+                "name": name,
+                "count": len(durations),
+                "total_ms": round(sum(durations), 1),
+                "p50_ms": round(percentile(durations, 50), 1),
+                "p95_ms": round(percentile(durations, 95), 1),
+                "max_ms": round(max(durations), 1)
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+def format_summary(rows):
+    """Render summary() rows as a Markdown table"""
+    lines = [
+        "| Step | Category | Count | Total ms | p50 ms | p95 ms | Max ms |",
+        "|------|----------|------:|---------:|-------:|-------:|-------:|"
+    ]
+    for row in rows:
+        lines.append(f"| {row['name']} | {row['cat']} | {row['count']} | {row['total_ms']} | "
+                     f"{row['p50_ms']} | {row['p95_ms']} | {row['max_ms']} |")
+    return "\n".join(lines)
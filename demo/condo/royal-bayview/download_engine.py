@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Download Engine
+Runs the downloader's file fetches on a thread pool: a fixed number of workers for the whole
+run, a cap on requests in flight to any one host, and aggregate throughput (files, bytes and
+MB/s) for the run.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DownloadEngine:
+    """Thread pool for download jobs with per-host request limits"""
+
+    def __init__(self, workers=8, host_limit=4):
+        self.workers = workers
+        self.host_limit = host_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        # Throughput is measured from the first job to shutdown
+        self._start = None
+        self._end = None
+        self.stats = {"jobs": 0, "failed_jobs": 0, "files": 0, "bytes": 0}
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on a worker and return its future"""
+        with self._lock:
+            self.stats["jobs"] += 1
+            if self._start is None:
+                self._start = time.perf_counter()
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def results(self, futures):
+        """Wait for futures and return their results; a job that raised counts as False"""
+        wait(futures)
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Download job failed: {e}")
+                with self._lock:
+                    self.stats["failed_jobs"] += 1
+                results.append(False)
+        return results
+
+    def _slots(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.host_limit)
+            return self._host_slots[host]
+
+    @contextmanager
+    def host_slot(self, url):
+        """Hold one of the host's request slots for the enclosed request"""
+        with self._slots(url):
+            yield
+
+    @contextmanager
+    def extra_host_slots(self, url, wanted):
+        """Hold up to wanted more of the host's slots, only those free now, and yield how many
+
+        Never blocks, so a job already holding a slot cannot deadlock waiting for more.
+        """
+        slots = self._slots(url)
+        held = 0
+        try:
+            while held < wanted and slots.acquire(blocking=False):
+                held += 1
+            yield held
+        finally:
+            for _ in range(held):
+                slots.release()
+
+    def record(self, size):
+        """Count one completed file of size bytes"""
+        with self._lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += size
+
+    def summary(self):
+        elapsed = ((self._end or time.perf_counter()) - self._start) if self._start is not None else 0
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "host_limit": self.host_limit,
+            "wall_time_s": round(elapsed, 3),
+            "files_per_s": round(self.stats["files"] / elapsed, 2) if elapsed else 0,
+            "mb_per_s": round(self.stats["bytes"] / 1048576 / elapsed, 2) if elapsed else 0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._end = time.perf_counter()
@@ -5,22 +5,62 @@ Downloads and organizes media files from the cataloged URLs.
 Filters to keep only relevant Royal Bayview project content.
 """
 
-import os
+import re
 import json
-import requests
+import posixpath
+import hashlib
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse, unquote, urljoin
 import logging
-from datetime import datetime
 from bs4 import BeautifulSoup
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    # Slower, but always available
+    HTML_PARSER = 'html.parser'
+
+from contentful_assets import CONTENTFUL_HOSTS, asset_key, collapse_variants, parse_contentful_url, rendition_url
+from asset_store import AssetStore
+from crawl_frontier import NON_PAGE_EXTENSIONS, CrawlFrontier
+from download_engine import DownloadEngine
+from download_metrics import METRICS_FILENAME, DownloadMetrics, format_table
+from extraction_records import MEDIA_RECORD_TYPES, RECORDS_FILENAME, is_complete, iter_records
+from http_transport import HttpTransport
+from media_inventory import MediaInventory
+from ranged_download import RangedDownload
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Renditions requested from the Contentful Images API. Print files keep the top-level images
+# folder and the original file names; later stages use these and never resize locally.
+IMAGE_RENDITIONS = {
+    "print": {"folder": "", "suffix": "", "params": {"w": 2400, "fm": "jpg", "q": 90, "fl": "progressive"}},
+    "web": {"folder": "web", "suffix": "_web", "params": {"w": 1440, "fm": "webp", "q": 80}},
+    "thumbnail": {"folder": "thumbnails", "suffix": "_thumb",
+                  "params": {"w": 300, "h": 200, "fit": "fill", "fm": "jpg", "q": 85, "fl": "progressive"}}
+}
+
+# Elements whose attribute loads a resource of a saved page
+ASSET_ATTRIBUTES = {"img": "src", "script": "src", "link": "href"}
+
+# <link> relations that point at another document or origin rather than a page resource
+SKIPPED_LINK_RELS = {"canonical", "alternate", "icon", "shortcut", "dns-prefetch", "preconnect"}
+
 class RoyalBayviewMediaDownloader:
-    def __init__(self, json_file="output/website_content_extraction.json", output_dir="output"):
+    def __init__(self, json_file="output/website_content_extraction.json", output_dir="output",
+                 base_url="https://www.tridel.com/royalbayview/", pool_size=10, retries=3,
+                 connect_timeout=10, read_timeout=30, workers=8, host_limit=4, split_mb=8, segments=4):
         self.json_file = Path(json_file)
+        # Landing page of the project; its directory bounds which HTML pages are saved
+        self.base_url = base_url
         self.output_dir = Path(output_dir)
         self.media_dir = self.output_dir / "media"
         self.images_dir = self.media_dir / "images"
@@ -31,12 +71,56 @@ class RoyalBayviewMediaDownloader:
         # Create directories
         for dir_path in [self.images_dir, self.videos_dir, self.documents_dir, self.pages_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
+        for rendition in IMAGE_RENDITIONS.values():
+            (self.images_dir / rendition["folder"]).mkdir(exist_ok=True)
+        # Every finished file reports to the inventory, so it never rescans the folders
+        self.inventory = MediaInventory(self.media_dir, self.output_dir)
 
         # Track downloaded files to avoid duplicates
         self.downloaded_files = set()
+        # Identities of downloaded assets, so another variant of one asset is not fetched again
+        self.downloaded_assets = set()
+        # Guards the two sets above: a file or asset is claimed before it is fetched
+        self._claim_lock = threading.Lock()
+
+        # Documents and videos larger than split_mb are fetched as parallel ranged segments
+        self.split_above = split_mb * 1024 * 1024
+        self.segments = segments
+        # Unfinished resumable downloads, kept out of the folders later stages copy from
+        self.partial_dir = self.media_dir / ".partial"
+
+        # Every request of the run shares these keep-alive pools and retry policy
+        self.transport = HttpTransport(pool_size=max(pool_size, host_limit), retries=retries,
+                                       connect_timeout=connect_timeout, read_timeout=read_timeout)
+        # Files are fetched by a pool of workers, at most host_limit at a time per host
+        self.engine = DownloadEngine(workers=workers, host_limit=host_limit)
+        # Per-host latency, bytes and duplicate skips, and network versus parsing time
+        self.metrics = DownloadMetrics()
+        # Assets of saved pages, stored once by content hash and shared by every page
+        self.asset_store = AssetStore(self.pages_dir / "_store", on_reuse=self.metrics.skip)
+
+    def complete_records_file(self):
+        """The extractor's record stream, or None if it is missing or its run never finished"""
+        records_file = self.json_file.parent / RECORDS_FILENAME
+        if not records_file.exists():
+            return None
+        if not is_complete(records_file):
+            # A crashed crawl leaves a partial stream; the last complete run's JSON is more useful
+            logger.warning(f"{records_file} has no run_end record; ignoring the unfinished crawl")
+            return None
+        return records_file
 
     def load_media_data(self):
-        """Load media assets from the extraction JSON"""
+        """Load media assets from the record stream, falling back to the extraction JSON"""
+        records_file = self.complete_records_file()
+        if records_file is not None:
+            # Only asset records are read, so page text never has to be loaded
+            media_data = {key: [] for key in MEDIA_RECORD_TYPES.values()}
+            for record in iter_records(records_file, types=MEDIA_RECORD_TYPES):
+                media_data[MEDIA_RECORD_TYPES[record["type"]]].append(record["data"])
+            logger.info(f"Loaded media assets from {records_file}")
+            return media_data
+
         with open(self.json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
         return data.get('media_assets', {})
@@ -80,30 +164,76 @@ class RoyalBayviewMediaDownloader:
         text = (url + ' ' + (title or '')).lower()
         return 'royal' in text or 'bayview' in text or 'pdf' in url.lower()
 
-    def download_file(self, url, filename, folder):
-        """Download a file from URL to specified folder"""
-        if filename in self.downloaded_files:
-            logger.info(f"Skipping duplicate: {filename}")
-            return False
+    def download_file(self, url, filename, folder, rendition=None, resumable=False):
+        """Download a file from URL to specified folder (safe to call from engine workers)
+
+        Resumable downloads keep a .part file across failures and runs and continue it with
+        HTTP ranges; large ones are split into parallel segments. Returns the file's inventory
+        event, or False if it was skipped or failed.
+        """
+        key = f"{asset_key(url)}#{rendition}" if rendition else asset_key(url)
+        with self._claim_lock:
+            if filename in self.downloaded_files:
+                logger.info(f"Skipping duplicate: {filename}")
+                self.metrics.skip(url)
+                return False
+            if key in self.downloaded_assets:
+                logger.info(f"Skipping another variant of an already downloaded asset: {url}")
+                self.metrics.skip(url)
+                return False
+            self.downloaded_files.add(filename)
+            self.downloaded_assets.add(key)
 
+        elapsed = None
         try:
             logger.info(f"Downloading: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-
             filepath = folder / filename
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            self.downloaded_files.add(filename)
+            with self.engine.host_slot(url):
+                # Timed once the slot is held, so waiting behind other requests is not latency
+                start = time.perf_counter()
+                try:
+                    if resumable:
+                        # Segments beyond the first only run on host slots that are free
+                        result = RangedDownload(self.transport, url, filepath, split_above=self.split_above,
+                                                segments=self.segments,
+                                                slots=lambda wanted: self.engine.extra_host_slots(url, wanted),
+                                                partial_dir=self.partial_dir / folder.name).run()
+                    else:
+                        result = self.transport.download(url, filepath)
+                finally:
+                    elapsed = time.perf_counter() - start
+
+            self.engine.record(result["bytes"])
+            event = self.inventory.record(
+                self._media_kind(folder), filepath, url, result["sha256"], result["bytes"],
+                result["content_type"], round(elapsed * 1000, 1), rendition=rendition
+            )
+            self.metrics.observe(url, elapsed, result["bytes"])
             logger.info(f"Downloaded: {filepath}")
-            return True
+            return event
 
         except Exception as e:
             logger.error(f"Failed to download {url}: {e}")
+            if elapsed is not None:
+                self.metrics.observe(url, elapsed, failed=True)
+            # Release the claim so another variant of the asset may still be tried
+            with self._claim_lock:
+                self.downloaded_files.discard(filename)
+                self.downloaded_assets.discard(key)
             return False
 
+    def _media_kind(self, folder):
+        """Inventory section of a media folder (images/web is still "images")"""
+        return Path(folder).relative_to(self.media_dir).parts[0]
+
+    def save_text(self, filepath, text, url, content_type="text/html", elapsed_ms=None):
+        """Write a file produced here (a saved page or embed) and report it to the inventory"""
+        body = text.encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(body)
+        return self.inventory.record(self._media_kind(filepath.parent), filepath, url,
+                                     hashlib.sha256(body).hexdigest(), len(body), content_type, elapsed_ms)
+
     def generate_filename(self, url, prefix="", extension=""):
         """Generate a clean filename from URL with proper extension handling"""
         parsed = urlparse(url)
@@ -155,29 +285,59 @@ class RoyalBayviewMediaDownloader:
     def download_images(self, images_data):
         """Download relevant images"""
         logger.info("Downloading images...")
-        downloaded = 0
-
-        for i, img in enumerate(images_data):
-            url = img.get('url', '')
-            alt = img.get('alt', '')
-            category = img.get('category', 'general')
-
-            if self.is_relevant_image(url, alt, category):
-                # Generate meaningful filename
-                prefix = f"rb_{category}_{i+1:02d}"
-                filename = self.generate_filename(url, prefix)
-
-                if self.download_file(url, filename, self.images_dir):
-                    downloaded += 1
-            else:
-                logger.info(f"Skipping irrelevant image: {alt}")
-
-        return downloaded
+        # One entry per asset, pointing at its best rendition
+        jobs = [self.submit_image(img, i) for i, img in enumerate(collapse_variants(images_data))]
+        return self.count_downloaded(jobs)
+
+    def submit_image(self, img, i):
+        """Queue the download of one image (or its renditions); None if it is not relevant"""
+        url = img.get('url', '')
+        alt = img.get('alt', '')
+        category = img.get('category', 'general')
+
+        if not self.is_relevant_image(url, alt, category):
+            logger.info(f"Skipping irrelevant image: {alt}")
+            return None
+
+        # Generate meaningful filename
+        prefix = f"rb_{category}_{i+1:02d}"
+        if parse_contentful_url(url) is not None:
+            return self.engine.submit(self.download_renditions, url, prefix)
+        filename = self.generate_filename(url, prefix)
+        return self.engine.submit(self.download_file, url, filename, self.images_dir)
+
+    def count_downloaded(self, jobs):
+        """Wait for submitted jobs and count the ones that produced a file"""
+        return sum(1 for result in self.engine.results([job for job in jobs if job is not None]) if result)
+
+    def download_renditions(self, url, prefix):
+        """Download the print, web and thumbnail renditions of a Contentful image"""
+        renditions = {}
+        for name, spec in IMAGE_RENDITIONS.items():
+            rendition = rendition_url(url, spec["params"])
+            filename = self.generate_filename(rendition, prefix)
+            filename = f"{Path(filename).stem}{spec['suffix']}{Path(filename).suffix}"
+            folder = self.images_dir / spec["folder"]
+            event = self.download_file(rendition, filename, folder, rendition=name)
+            if event:
+                renditions[name] = {
+                    "filename": filename,
+                    "path": event["path"],
+                    "size": event["bytes"],
+                    "width": spec["params"].get("w"),
+                    "height": spec["params"].get("h"),
+                    "format": spec["params"]["fm"],
+                    "url": rendition
+                }
+
+        if "print" in renditions:
+            self.inventory.add_renditions(renditions["print"]["filename"], renditions)
+        return renditions
 
     def download_videos(self, videos_data):
         """Download videos"""
         logger.info("Downloading videos...")
-        downloaded = 0
+        jobs = []
 
         for i, video in enumerate(videos_data):
             url = video.get('url', '')
@@ -186,146 +346,198 @@ class RoyalBayviewMediaDownloader:
                 # For Vimeo videos, we might need to handle differently
                 # For now, just try to download directly
                 filename = f"rb_video_{i+1:02d}.mp4"
-                if self.download_file(url, filename, self.videos_dir):
-                    downloaded += 1
+                jobs.append(self.engine.submit(self.download_file, url, filename, self.videos_dir))
 
-        return downloaded
+        return sum(1 for result in self.engine.results(jobs) if result)
 
     def download_documents(self, documents_data):
         """Download documents"""
         logger.info("Downloading documents...")
-        downloaded = 0
-
-        for i, doc in enumerate(documents_data):
-            url = doc.get('url', '')
-            title = doc.get('title', '')
-
-            if self.is_relevant_document(url, title):
-                filename = self.generate_filename(url, f"rb_doc_{i+1:02d}", "pdf")
-                if self.download_file(url, filename, self.documents_dir):
-                    downloaded += 1
+        jobs = [self.submit_document(doc, i) for i, doc in enumerate(collapse_variants(documents_data))]
+        return self.count_downloaded(jobs)
+
+    def submit_document(self, doc, i):
+        """Queue the download of one document; None if it is not relevant"""
+        url = doc.get('url', '')
+        title = doc.get('title', '')
+
+        if not self.is_relevant_document(url, title):
+            return None
+        filename = self.generate_filename(url, f"rb_doc_{i+1:02d}", "pdf")
+        return self.engine.submit(self.download_file, url, filename, self.documents_dir, resumable=True)
+
+    def crawled_page_urls(self):
+        """URLs of the pages the extractor crawled, read from its record stream"""
+        records_file = self.complete_records_file()
+        if records_file is None:
+            # Pages are discovered from the landing page and sitemap instead
+            return []
+        return [record["url"] for record in iter_records(records_file, types=("page",))]
+
+    def fetch_sitemap(self, url):
+        """Text of a sitemap, or None when the site does not serve one"""
+        try:
+            response = self.transport.get(url)
+            if response.status_code == 200:
+                return response.text
+        except Exception as e:
+            logger.info(f"No sitemap at {url}: {e}")
+        return None
 
-        return downloaded
+    def page_name(self, frontier, url):
+        """Name a saved page after its path below the project ("overview" for the landing page)"""
+        path = frontier.relative_path(url).split('?')[0]
+        return re.sub(r'\.html?$', '', path).replace('/', '-') or "overview"
 
     def download_html_pages(self):
-        """Download key HTML pages as complete web pages with local link resolution"""
-        logger.info("Downloading key HTML pages with local link resolution...")
-
-        # Key pages to download based on navigation
-        key_pages = {
-            "overview": "https://www.tridel.com/royalbayview/",
-            "amenities": "https://www.tridel.com/royalbayview/amenities",
-            "prices-floorplans": "https://www.tridel.com/royalbayview/prices-floorplans",
-            "neighbourhood": "https://www.tridel.com/royalbayview/neighbourhood",
-            "gallery": "https://www.tridel.com/royalbayview/gallery",
-            "news": "https://www.tridel.com/royalbayview/news",
-            "presentation-centre": "https://www.tridel.com/royalbayview/presentation-centre"
-        }
+        """Download the project's HTML pages as complete web pages with local link resolution"""
+        logger.info("Downloading HTML pages with local link resolution...")
+
+        # Save the pages the extractor crawled; without its records, discover the landing
+        # page's links and the sitemap's pages through the same frontier
+        frontier = CrawlFrontier(self.base_url, max_depth=1)
+        frontier.add(self.base_url, depth=0, source="landing")
+        crawled = self.crawled_page_urls()
+        for url in crawled:
+            frontier.add(url, depth=1, source="extractor")
+        discover = not crawled
+        if discover:
+            frontier.seed_from_sitemap(self.fetch_sitemap)
 
         downloaded = 0
-        for page_name, url in key_pages.items():
+        # Saved page filename -> its rewritten HTML and the page links it points at saved copies
+        processed = {}
+        entry = frontier.pop()
+        while entry is not None:
+            url = entry.url
+            page_name = self.page_name(frontier, url)
             try:
                 logger.info(f"Downloading and processing HTML page: {page_name}")
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
+                start = time.perf_counter()
+                with self.engine.host_slot(url):
+                    fetch_start = time.perf_counter()
+                    try:
+                        response = self.transport.get(url)
+                        response.raise_for_status()
+                    except Exception:
+                        self.metrics.observe(url, time.perf_counter() - fetch_start, failed=True)
+                        raise
+                self.metrics.observe(url, time.perf_counter() - fetch_start, len(response.content))
 
                 # Parse HTML and resolve links
-                soup = BeautifulSoup(response.text, 'html.parser')
-                base_url = url.rstrip('/')
-
-                # Create subdirectory for this page's assets
-                page_assets_dir = self.pages_dir / f"{page_name}_assets"
-                page_assets_dir.mkdir(exist_ok=True)
+                with self.metrics.timed("parse"):
+                    soup = BeautifulSoup(response.text, HTML_PARSER)
+                    if discover:
+                        frontier.add_links([link['href'] for link in soup.find_all('a', href=True)], entry)
+
+                # Process different types of links; assets go to the shared store
+                assets_downloaded = self._resolve_and_download_assets(soup, response.url)
+
+                # Point links to other project pages at their saved copies
+                with self.metrics.timed("parse"):
+                    links = self._update_html_links(soup, response.url, frontier)
+                    html = str(soup)
+                # Per-page asset copies from older runs are superseded by the store
+                shutil.rmtree(self.pages_dir / f"{page_name}_assets", ignore_errors=True)
+
+                # Written once the crawl is over, when it is known which linked pages were saved
+                processed[f"rb_{page_name}.html"] = {
+                    "html": html, "links": links, "url": response.url,
+                    "content_type": response.headers.get("Content-Type"),
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "assets": assets_downloaded
+                }
 
-                # Process different types of links
-                assets_downloaded = self._resolve_and_download_assets(soup, base_url, page_assets_dir, page_name)
-
-                # Update HTML links to point to local assets
-                self._update_html_links(soup, page_assets_dir, page_name)
+            except Exception as e:
+                logger.error(f"Failed to download HTML page {page_name}: {e}")
+            entry = frontier.pop()
 
-                # Save the modified HTML
-                filename = f"rb_{page_name}.html"
+        for filename, page in processed.items():
+            try:
+                html = self._unlink_unsaved_pages(page["html"], page["links"], processed)
                 filepath = self.pages_dir / filename
-
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(str(soup))
-
+                self.save_text(filepath, html, page["url"], page["content_type"], page["elapsed_ms"])
                 self.downloaded_files.add(filename)
                 downloaded += 1
-                logger.info(f"Saved HTML page with {assets_downloaded} local assets: {filepath}")
-
+                logger.info(f"Saved HTML page with {page['assets']} local assets: {filepath}")
             except Exception as e:
-                logger.error(f"Failed to download HTML page {page_name}: {e}")
+                logger.error(f"Failed to save HTML page {filename}: {e}")
 
+        self.asset_store.save_index()
+        store = self.asset_store.summary()
+        logger.info(f"Page assets: {store['references']} references to {store['urls']} URLs, "
+                    f"{store['blobs']} unique blobs ({store['bytes_written'] / 1024:.0f} KB written, "
+                    f"~{store['bytes_not_refetched'] / 1024:.0f} KB not re-fetched)")
         return downloaded
 
-    def _resolve_and_download_assets(self, soup, base_url, assets_dir, page_name):
-        """Download and resolve linked assets (images, CSS, JS)"""
-        assets_downloaded = 0
-
-        # Process images
-        for img in soup.find_all('img', src=True):
-            assets_downloaded += self._download_asset(img, 'src', base_url, assets_dir, page_name, 'images')
-
-        # Process CSS links
-        for link in soup.find_all('link', rel='stylesheet', href=True):
-            assets_downloaded += self._download_asset(link, 'href', base_url, assets_dir, page_name, 'css')
-
-        # Process JavaScript
-        for script in soup.find_all('script', src=True):
-            assets_downloaded += self._download_asset(script, 'src', base_url, assets_dir, page_name, 'js')
-
-        # Process other linked resources
-        for link in soup.find_all('link', href=True):
-            if link.get('rel') not in ['stylesheet', 'canonical', 'icon', 'shortcut icon']:
-                assets_downloaded += self._download_asset(link, 'href', base_url, assets_dir, page_name, 'assets')
+    def _resolve_and_download_assets(self, soup, page_url):
+        """Fetch each asset URL on the page once and point every reference at the stored copy"""
+        # One pass over the document collects every element that loads each URL
+        references = {}
+        with self.metrics.timed("parse"):
+            for element in soup.find_all(list(ASSET_ATTRIBUTES)):
+                attr = ASSET_ATTRIBUTES[element.name]
+                url = element.get(attr)
+                if not url or url.startswith('data:') or url.startswith('#'):
+                    continue
+                # rel is a list of tokens ("shortcut icon" -> ["shortcut", "icon"])
+                if element.name == 'link' and SKIPPED_LINK_RELS.intersection(element.get('rel', [])):
+                    continue
+
+                # Relative URLs resolve against the page's final URL, as in a browser
+                absolute_url = urljoin(page_url, url)
+
+                # Skip external domains (keep the site's own and its Contentful assets)
+                if not self.is_first_party_asset(absolute_url):
+                    continue
+                references.setdefault(absolute_url, []).append((element, attr))
+
+        urls = list(references)
+        for url in urls:
+            # Further references on the same page share the one fetch
+            if len(references[url]) > 1:
+                self.metrics.skip(url, len(references[url]) - 1)
+        blobs = self.engine.results([self.engine.submit(self._store_asset, url) for url in urls])
 
+        assets_downloaded = 0
+        for url, blob in zip(urls, blobs):
+            if not blob:
+                continue
+            relative_path = f"{self.asset_store.root.name}/{blob}"
+            for element, attr in references[url]:
+                element[attr] = relative_path
+            self.downloaded_files.add(relative_path)
+            assets_downloaded += 1
         return assets_downloaded
 
-    def _download_asset(self, element, attr, base_url, assets_dir, page_name, asset_type):
-        """Download a single asset and return 1 if successful"""
-        try:
-            url = element[attr]
-            if not url or url.startswith('data:') or url.startswith('#'):
-                return 0
-
-            # Convert relative URLs to absolute
-            absolute_url = urljoin(base_url + '/', url)
-
-            # Skip external domains (keep only tridel.com and related)
-            parsed_url = urlparse(absolute_url)
-            if not (parsed_url.netloc.endswith('tridel.com') or 'ctfassets.net' in parsed_url.netloc):
-                return 0
-
-            # Generate local filename
-            url_path = unquote(parsed_url.path)
-            filename = os.path.basename(url_path)
-            if not filename:
-                filename = f"{asset_type}_{hash(absolute_url) % 10000}.{self._get_extension_from_url(absolute_url)}"
-
-            # Create asset type subdirectory
-            asset_dir = assets_dir / asset_type
-            asset_dir.mkdir(exist_ok=True)
-
-            local_path = asset_dir / filename
-
-            # Download the asset
-            response = requests.get(absolute_url, timeout=30)
-            response.raise_for_status()
-
-            with open(local_path, 'wb') as f:
-                f.write(response.content)
-
-            # Update the element to point to local path
-            relative_path = f"{page_name}_assets/{asset_type}/{filename}"
-            element[attr] = relative_path
-
-            self.downloaded_files.add(relative_path)
-            return 1
+    def is_first_party_asset(self, url):
+        """Is url served from the project site's domain (or a subdomain) or from Contentful?"""
+        host = urlparse(url).hostname or ""
+        if host in CONTENTFUL_HOSTS:
+            return True
+        site = '.'.join((urlparse(self.base_url).hostname or "").split('.')[-2:])
+        return host == site or host.endswith('.' + site)
 
+    def _store_asset(self, url):
+        """Blob name of a page asset in the store, fetched on first use; None if it failed"""
+        try:
+            return self.asset_store.get(url, self._fetch_asset, self._get_extension_from_url(url))
         except Exception as e:
             logger.debug(f"Failed to download asset {url}: {e}")
-            return 0
+            return None
+
+    def _fetch_asset(self, url, path):
+        """Stream a page asset to path"""
+        with self.engine.host_slot(url):
+            start = time.perf_counter()
+            try:
+                result = self.transport.download(url, path)
+            except Exception:
+                self.metrics.observe(url, time.perf_counter() - start, failed=True)
+                raise
+        self.metrics.observe(url, time.perf_counter() - start, result["bytes"])
+        self.engine.record(result["bytes"])
+        return result
 
     def _get_extension_from_url(self, url):
         """Extract file extension from URL"""
@@ -340,41 +552,78 @@ class RoyalBayviewMediaDownloader:
             return format_param.lower()
         return 'bin'
 
-    def _update_html_links(self, soup, assets_dir, page_name):
-        """Update any remaining links in HTML to point to local resources"""
-        # Update any internal links to point to local HTML files
+    def _update_html_links(self, soup, page_url, frontier):
+        """Point links to project pages at their local copies
+
+        Returns the local filename -> absolute URL of every page linked, so links to pages
+        that end up not being saved can be pointed back at the site.
+        """
+        links = {}
         for a in soup.find_all('a', href=True):
-            href = a['href']
-            if href.startswith('/royalbayview/'):
-                # Convert to local HTML file reference
-                page_part = href.split('/royalbayview/')[1].split('/')[0]
-                if page_part in ['amenities', 'prices-floorplans', 'neighbourhood', 'gallery', 'news', 'presentation-centre']:
-                    a['href'] = f"rb_{page_part}.html"
-                elif href == '/royalbayview/' or href == '/royalbayview':
-                    a['href'] = 'rb_overview.html'
+            if a['href'].startswith('#'):
+                continue
+            absolute_url, _, fragment = urljoin(page_url, a['href']).partition('#')
+            if not frontier.in_scope(absolute_url):
+                continue
+            if posixpath.splitext(urlparse(absolute_url).path)[1].lower() in NON_PAGE_EXTENSIONS:
+                continue
+            filename = f"rb_{self.page_name(frontier, absolute_url)}.html"
+            links.setdefault(filename, absolute_url)
+            a['href'] = f"{filename}#{fragment}" if fragment else filename
+        return links
+
+    def _unlink_unsaved_pages(self, html, links, saved):
+        """Point links to pages that were not saved this run back at the site"""
+        unsaved = {filename: url for filename, url in links.items() if filename not in saved}
+        if not unsaved:
+            return html
+        with self.metrics.timed("parse"):
+            soup = BeautifulSoup(html, HTML_PARSER)
+            for a in soup.find_all('a', href=True):
+                filename, _, fragment = a['href'].partition('#')
+                if filename in unsaved:
+                    a['href'] = f"{unsaved[filename]}#{fragment}" if fragment else unsaved[filename]
+            return str(soup)
 
     def download_videos_improved(self, videos_data):
         """Download videos with improved handling"""
         logger.info("Downloading videos with improved handling...")
-        downloaded = 0
+        jobs = [self.submit_video(video, i) for i, video in enumerate(collapse_variants(videos_data))]
+        return self.count_downloaded(jobs)
 
-        for i, video in enumerate(videos_data):
-            url = video.get('url', '')
+    def submit_video(self, video, i):
+        """Queue one video: a Vimeo embed page, or a direct download; None if there is nothing to do"""
+        url = video.get('url', '')
 
-            if self.is_relevant_video(url):
-                try:
-                    # For Vimeo videos, try to get the direct video URL
-                    if 'vimeo.com' in url:
-                        # Extract video ID from Vimeo URL
-                        video_id = None
-                        if 'player.vimeo.com/video/' in url:
-                            video_id = url.split('player.vimeo.com/video/')[1].split('?')[0].split('/')[0]
-
-                        if video_id:
-                            # Try to get video info from Vimeo API (this might not work without auth)
-                            # For now, just save the embed URL as reference
-                            filename = f"rb_vimeo_video_{video_id}_embed.html"
-                            embed_html = f"""
+        if not self.is_relevant_video(url):
+            return None
+        try:
+            # For Vimeo videos, try to get the direct video URL
+            if 'vimeo.com' in url:
+                # Extract video ID from Vimeo URL
+                video_id = None
+                if 'player.vimeo.com/video/' in url:
+                    video_id = url.split('player.vimeo.com/video/')[1].split('?')[0].split('/')[0]
+
+                if video_id:
+                    return self.engine.submit(self.save_vimeo_embed, url, video_id)
+                logger.warning(f"Could not extract video ID from: {url}")
+                return None
+
+            # For other video URLs, try direct download
+            filename = f"rb_video_{i+1:02d}.mp4"
+            return self.engine.submit(self.download_file, url, filename, self.videos_dir, resumable=True)
+
+        except Exception as e:
+            logger.error(f"Error processing video {url}: {e}")
+            return None
+
+    def save_vimeo_embed(self, url, video_id):
+        """Save a page embedding a Vimeo video"""
+        # Try to get video info from Vimeo API (this might not work without auth)
+        # For now, just save the embed URL as reference
+        filename = f"rb_vimeo_video_{video_id}_embed.html"
+        embed_html = f"""
                             <!DOCTYPE html>
                             <html>
                             <head><title>Royal Bayview Video {video_id}</title></head>
@@ -386,122 +635,73 @@ class RoyalBayviewMediaDownloader:
                             </html>
                             """
 
-                            filepath = self.videos_dir / filename
-                            with open(filepath, 'w', encoding='utf-8') as f:
-                                f.write(embed_html)
-
-                            self.downloaded_files.add(filename)
-                            downloaded += 1
-                            logger.info(f"Saved Vimeo embed: {filepath}")
-                        else:
-                            logger.warning(f"Could not extract video ID from: {url}")
-                    else:
-                        # For other video URLs, try direct download
-                        filename = f"rb_video_{i+1:02d}.mp4"
-                        if self.download_file(url, filename, self.videos_dir):
-                            downloaded += 1
-
-                except Exception as e:
-                    logger.error(f"Error processing video {url}: {e}")
-
-        return downloaded
+        filepath = self.videos_dir / filename
+        event = self.save_text(filepath, embed_html, url)
+
+        self.downloaded_files.add(filename)
+        logger.info(f"Saved Vimeo embed: {filepath}")
+        return event
+
+    def download_from_queue(self, media_queue):
+        """Start downloading assets as the extractor finds them, until it puts None on the queue
+
+        Returns the submitted jobs per media type; they may still be running.
+        """
+        submitters = {"images": self.submit_image, "videos": self.submit_video, "documents": self.submit_document}
+        jobs = {media_type: [] for media_type in submitters}
+        while True:
+            item = media_queue.get()
+            if item is None:
+                return jobs
+            record_type, data = item
+            media_type = MEDIA_RECORD_TYPES[record_type]
+            # Numbered in arrival order, which is the order of the extraction JSON
+            jobs[media_type].append(submitters[media_type](data, len(jobs[media_type])))
 
     def create_inventory(self):
-        """Create an inventory of all downloaded files"""
+        """Write inventory.json and media_inventory.json from this run's download events"""
         logger.info("Creating inventory of downloaded files...")
+        rendition_specs = {name: spec["params"] for name, spec in IMAGE_RENDITIONS.items()}
+        return self.inventory.save(rendition_specs, extra={"page_asset_store": self.asset_store.summary()})
 
-        inventory = {
-            "download_date": datetime.now().isoformat(),
-            "total_files": len(self.downloaded_files),
-            "images": [],
-            "videos": [],
-            "documents": [],
-            "pages": []
-        }
+    def download_all_media(self, media_queue=None):
+        """Main method to download all media
 
-        # Inventory images
-        for img_file in sorted(self.images_dir.glob("*")):
-            if img_file.is_file():
-                inventory["images"].append({
-                    "filename": img_file.name,
-                    "path": str(img_file),
-                    "size": img_file.stat().st_size
-                })
-
-        # Inventory videos
-        for vid_file in sorted(self.videos_dir.glob("*")):
-            if vid_file.is_file():
-                inventory["videos"].append({
-                    "filename": vid_file.name,
-                    "path": str(vid_file),
-                    "size": vid_file.stat().st_size
-                })
-
-        # Inventory documents
-        for doc_file in sorted(self.documents_dir.glob("*")):
-            if doc_file.is_file():
-                inventory["documents"].append({
-                    "filename": doc_file.name,
-                    "path": str(doc_file),
-                    "size": doc_file.stat().st_size
-                })
-
-        # Inventory pages
-        for page_file in sorted(self.pages_dir.glob("*")):
-            if page_file.is_file():
-                inventory["pages"].append({
-                    "filename": page_file.name,
-                    "path": str(page_file),
-                    "size": page_file.stat().st_size
-                })
-
-        # Save inventory to JSON
-        inventory_path = self.media_dir / "inventory.json"
-        with open(inventory_path, 'w', encoding='utf-8') as f:
-            json.dump(inventory, f, indent=2, ensure_ascii=False)
-
-        logger.info(f"Inventory created with {inventory['total_files']} files")
-        return inventory
-        for vid_file in sorted(self.videos_dir.glob("*")):
-            if vid_file.is_file():
-                inventory["videos"].append({
-                    "filename": vid_file.name,
-                    "size_kb": round(vid_file.stat().st_size / 1024, 1),
-                    "path": str(vid_file.relative_to(self.output_dir))
-                })
-
-        # Inventory documents
-        for doc_file in sorted(self.documents_dir.glob("*")):
-            if doc_file.is_file():
-                inventory["documents"].append({
-                    "filename": doc_file.name,
-                    "size_kb": round(doc_file.stat().st_size / 1024, 1),
-                    "path": str(doc_file.relative_to(self.output_dir))
-                })
-
-        # Save inventory
-        inventory_file = self.media_dir / "media_inventory.json"
-        with open(inventory_file, 'w', encoding='utf-8') as f:
-            json.dump(inventory, f, indent=2, ensure_ascii=False)
-
-        logger.info(f"Media inventory saved to {inventory_file}")
-        return inventory
-
-    def download_all_media(self):
-        """Main method to download all media"""
+        With a media_queue, assets are taken from the running extractor instead of its JSON
+        output, and pages are saved once it signals the end of the crawl.
+        """
         logger.info("Starting Royal Bayview media download...")
 
-        # Load media data
-        media_data = self.load_media_data()
-
-        # Download each type
-        images_downloaded = self.download_images(media_data.get('images', []))
-        videos_downloaded = self.download_videos_improved(media_data.get('videos', []))
-        documents_downloaded = self.download_documents(media_data.get('documents', []))
-        pages_downloaded = self.download_html_pages()
+        if media_queue is not None:
+            jobs = self.download_from_queue(media_queue)
+            pages_downloaded = self.download_html_pages()
+            images_downloaded = self.count_downloaded(jobs["images"])
+            videos_downloaded = self.count_downloaded(jobs["videos"])
+            documents_downloaded = self.count_downloaded(jobs["documents"])
+        else:
+            # Load media data
+            with self.metrics.timed("parse"):
+                media_data = self.load_media_data()
+
+            # Download each type at the same time; every file is fetched on the shared engine
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix="media") as categories:
+                images = categories.submit(self.download_images, media_data.get('images', []))
+                videos = categories.submit(self.download_videos_improved, media_data.get('videos', []))
+                documents = categories.submit(self.download_documents, media_data.get('documents', []))
+                pages = categories.submit(self.download_html_pages)
+            images_downloaded = images.result()
+            videos_downloaded = videos.result()
+            documents_downloaded = documents.result()
+            pages_downloaded = pages.result()
+        self.engine.shutdown()
+        throughput = self.engine.summary()
 
         # Create inventory
         inventory = self.create_inventory()
+        connections = self.transport.connection_stats()
+        self.transport.log_stats()
+        self.transport.close()
+        metrics = self.metrics.save(self.media_dir / METRICS_FILENAME, connections, throughput["wall_time_s"])
 
         # Summary
         total_downloaded = images_downloaded + videos_downloaded + documents_downloaded + pages_downloaded
@@ -512,6 +712,8 @@ class RoyalBayviewMediaDownloader:
         logger.info(f"Documents downloaded: {documents_downloaded}")
         logger.info(f"HTML pages downloaded: {pages_downloaded}")
         logger.info(f"Total files: {total_downloaded}")
+        logger.info(f"Throughput: {throughput['files']} files, {throughput['bytes'] / 1048576:.1f} MB in "
+                    f"{throughput['wall_time_s']} s ({throughput['mb_per_s']} MB/s, {throughput['workers']} workers)")
 
         return {
             "images": images_downloaded,
@@ -519,6 +721,9 @@ class RoyalBayviewMediaDownloader:
             "documents": documents_downloaded,
             "pages": pages_downloaded,
             "total": total_downloaded,
+            "connections": connections,
+            "throughput": throughput,
+            "metrics": metrics,
             "inventory": inventory
         }
 
@@ -536,8 +741,13 @@ def main():
     print(f"Documents downloaded: {results['documents']}")
     print(f"HTML pages downloaded: {results['pages']}")
     print(f"Total files: {results['total']}")
+    print(f"Throughput: {results['throughput']['mb_per_s']} MB/s, {results['throughput']['files_per_s']} files/s "
+          f"over {results['throughput']['wall_time_s']} s")
     print(f"Files saved to: {downloader.media_dir}")
     print("="*50)
+    print(format_table(results['metrics']))
+    print(f"Metrics saved to: {downloader.media_dir / METRICS_FILENAME}")
+    print("="*50)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
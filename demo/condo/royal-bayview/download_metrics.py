@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Download Metrics
+Structured measurements of a download run, per host: files fetched, bytes, latency percentiles,
+failures and duplicate fetches skipped, merged with the transport's request, retry and error
+counts. Also splits the run's time between the network and HTML parsing, so a slow host or a
+parse-bound run shows up in the numbers rather than in the log.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+import logging
+
+from crawl_trace import percentile
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILENAME = "download_metrics.json"
+
+# Latency percentiles reported per host
+PERCENTILES = (50, 90, 99)
+
+class DownloadMetrics:
+    """Thread-safe per-host file and timing counters for one run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Host -> {"files", "bytes", "failed", "duplicate_skips", "latencies_ms"}
+        self.hosts = {}
+        # Phase -> seconds, summed over every thread (network time overlaps across workers)
+        self.phases = {"network": 0.0, "parse": 0.0}
+
+    def _host(self, url):
+        host = urlparse(url).netloc
+        return self.hosts.setdefault(host, {"files": 0, "bytes": 0, "failed": 0, "duplicate_skips": 0,
+                                            "latencies_ms": []})
+
+    def observe(self, url, elapsed_s, size=0, failed=False):
+        """Count one fetch of url that took elapsed_s on the network"""
+        with self._lock:
+            entry = self._host(url)
+            entry["latencies_ms"].append(round(elapsed_s * 1000, 1))
+            self.phases["network"] += elapsed_s
+            if failed:
+                entry["failed"] += 1
+            else:
+                entry["files"] += 1
+                entry["bytes"] += size
+
+    def skip(self, url, count=1):
+        """Count fetches of url avoided because the same file or asset was already fetched"""
+        with self._lock:
+            self._host(url)["duplicate_skips"] += count
+
+    @contextmanager
+    def timed(self, phase):
+        """Add the enclosed block's duration to phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+    def build(self, connections=None, wall_time_s=None):
+        """Metrics document: per-host table merged with the transport's connection stats"""
+        connections = connections or {}
+        hosts = {}
+        with self._lock:
+            for host in sorted(set(self.hosts) | set(connections)):
+                entry = self.hosts.get(host, {"files": 0, "bytes": 0, "failed": 0, "duplicate_skips": 0,
+                                              "latencies_ms": []})
+                transport = connections.get(host, {})
+                latencies = sorted(entry["latencies_ms"])
+                hosts[host] = {
+                    "requests": transport.get("requests", 0),
+                    "retries": transport.get("retries", 0),
+                    "errors": transport.get("errors", 0),
+                    "connections": transport.get("connections", 0),
+                    "files": entry["files"],
+                    "bytes": entry["bytes"],
+                    "failed": entry["failed"],
+                    "duplicate_skips": entry["duplicate_skips"],
+                    "latency_ms": {
+                        **{f"p{pct}": percentile(latencies, pct) for pct in PERCENTILES},
+                        "max": latencies[-1] if latencies else None
+                    }
+                }
+            phases = {phase: round(seconds, 3) for phase, seconds in self.phases.items()}
+        return {
+            "run_date": datetime.now().isoformat(),
+            "wall_time_s": wall_time_s,
+            "phases_s": phases,
+            "totals": {key: sum(entry[key] for entry in hosts.values())
+                       for key in ("requests", "retries", "errors", "files", "bytes", "failed", "duplicate_skips")},
+            "hosts": hosts
+        }
+
+    def save(self, path, connections=None, wall_time_s=None):
+        """Write the metrics document to path and return it"""
+        metrics = self.build(connections, wall_time_s)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        logger.info(f"Download metrics for {len(metrics['hosts'])} hosts written to {path}")
+        return metrics
+
+def format_table(metrics):
+    """Per-host summary table of a metrics document, as printable text"""
+    header = f"{'Host':<32} {'Req':>5} {'Retry':>5} {'Err':>4} {'Dup':>4} {'MB':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+    lines = [header, "-" * len(header)]
+    for host, entry in sorted(metrics["hosts"].items(), key=lambda item: -item[1]["bytes"]):
+        latency = entry["latency_ms"]
+        lines.append(
+            f"{host[:32]:<32} {entry['requests']:>5} {entry['retries']:>5} {entry['errors']:>4} "
+            f"{entry['duplicate_skips']:>4} {entry['bytes'] / 1048576:>8.1f} "
+            + " ".join(f"{latency[f'p{pct}'] if latency[f'p{pct}'] is not None else '-':>8}" for pct in PERCENTILES)
+        )
+    phases = metrics["phases_s"]
+    lines.append(f"Network {phases['network']} s, parsing {phases['parse']} s (summed over threads)")
+    return "\n".join(lines)
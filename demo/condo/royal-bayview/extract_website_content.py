@@ -1,38 +1,410 @@
 #!/usr/bin/env python3
 """
 Royal Bayview Website Content Extractor
-Uses Playwright to systematically browse and extract comprehensive content from Tridel's Royal Bayview website.
+Systematically extracts comprehensive content from Tridel's Royal Bayview website.
+Server-rendered pages are read over plain HTTP together with their Nuxt state; Playwright
+is only launched for pages that fast path cannot handle.
 """
 
+import argparse
 import asyncio
+import base64
+import copy
+import hashlib
 import json
 import os
 import re
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
+import time
 import requests
-from playwright.async_api import async_playwright
+from bs4 import BeautifulSoup
 import logging
 
+from browser_cache import BrowserCache, ResponseMemo
+from contentful_assets import collapse_variants
+from crawl_frontier import CrawlFrontier
+from crawl_trace import CrawlTrace, format_summary, percentile
+from extraction_records import RECORDS_FILENAME, RecordStream, compact_records
+from nuxt_payload import decode_nuxt_state, find_inline_state, find_state_urls, iter_fields
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+except ImportError:
+    # The HTTP fast path works without Playwright; only the browser fallback needs it
+    async_playwright = None
+
+    class PlaywrightTimeoutError(Exception):
+        pass
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Tags that hold no rendered text; dropped from static HTML so get_text() matches innerText
+NON_RENDERED_TAGS = ['script', 'style', 'noscript', 'template']
+
+# Page is hydrated once Nuxt has mounted the root app (plain pages only need the DOM parsed)
+NUXT_READY_JS = """() => document.readyState !== 'loading'
+    && (!window.__NUXT__ || !!(window.$nuxt && window.$nuxt._isMounted))"""
+
+# Every <img> that has started loading has finished (or failed) decoding
+IMAGES_READY_JS = "() => Array.from(document.images).every(img => img.complete)"
+
+# Evaluate a {group: {"selectors", "text", "attrs"}} spec in one round trip.
+# Invalid selectors are skipped, matching the per-selector try/except of the old element-by-element path.
+# Per-group durations (ms, measured in the page) are returned under "__timings".
+EXTRACT_SPEC_JS = """(spec) => {
+    const result = {__timings: {}};
+    for (const [name, group] of Object.entries(spec)) {
+        const started = performance.now();
+        const items = [];
+        for (const selector of group.selectors) {
+            let elements;
+            try {
+                elements = document.querySelectorAll(selector);
+            } catch (e) {
+                continue;
+            }
+            for (const element of elements) {
+                const item = {};
+                if (group.text) {
+                    item.text = element.innerText || '';
+                }
+                for (const attr of group.attrs || []) {
+                    item[attr] = element.getAttribute(attr);
+                }
+                items.push(item);
+            }
+        }
+        result[name] = items;
+        result.__timings[name] = performance.now() - started;
+    }
+    return result;
+}"""
+
+# Bumped whenever the shape of the per-page records kept in crawl_state.json changes
+CRAWL_STATE_VERSION = 2
+
+# Upper bound (ms) on the readiness wait for each kind of page
+READINESS_TIMEOUTS = {
+    "landing": 15000,
+    "linked": 8000,
+    "pricing": 10000
+}
+
+# Resource types each routing policy lets through; anything else, and any third-party
+# request when first_party_only is set, is aborted. "full" leaves the page unrouted.
+RESOURCE_POLICIES = {
+    "full": None,
+    "text": {
+        "allow_types": {"document", "script", "xhr", "fetch", "stylesheet"},
+        "first_party_only": True
+    },
+    "media": {
+        "allow_types": {"document", "script", "xhr", "fetch"},
+        "first_party_only": True
+    }
+}
+
+# Routing policy applied to each kind of page. The landing page is shared by the
+# text and media passes; its text passes read innerText, which depends on CSS layout
+# (hidden menus and modals), so it keeps stylesheets. The media pass only reads URLs.
+PAGE_POLICIES = {
+    "landing": "text",
+    "linked": "text",
+    "pricing": "text"
+}
+
+# Typical transfer size per resource type on the Tridel sites, used to estimate the
+# bytes an aborted request would have cost (the body of an aborted request is never seen)
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 150_000,
+    "media": 2_000_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 10_000
+}
+
+class PagePool:
+    """Bounded pool of reusable Playwright pages shared by concurrent crawl tasks"""
+
+    def __init__(self, context, size=4, new_page=None):
+        self.context = context
+        self.size = max(1, size)
+        # Coroutine function opening a page; defaults to context.new_page
+        self._new_page = new_page or context.new_page
+        self._idle = asyncio.Queue()
+        self._pages = []
+        # Pages being opened; they hold a slot before the await, so concurrent callers never overshoot size
+        self._opening = 0
+        # Most pages open at once during the pool's life
+        self.peak = 0
+
+    async def _open_page(self):
+        if len(self._pages) + self._opening >= self.size:
+            raise RuntimeError(f"Page pool is full ({self.size} pages)")
+        self._opening += 1
+        try:
+            page = await self._new_page()
+        finally:
+            self._opening -= 1
+        self._pages.append(page)
+        self.peak = max(self.peak, len(self._pages))
+        return page
+
+    async def acquire(self):
+        """Borrow an idle page, opening a new one while under the pool size"""
+        if self._idle.empty() and len(self._pages) + self._opening < self.size:
+            return await self._open_page()
+        return await self._idle.get()
+
+    async def release(self, page):
+        """Return a page to the pool, replacing it if it was closed"""
+        if page.is_closed():
+            self._pages.remove(page)
+            page = await self._open_page()
+        self._idle.put_nowait(page)
+
+    def slot(self, page):
+        """1-based position of a pooled page, stable while the page stays open"""
+        return self._pages.index(page) + 1
+
+    @asynccontextmanager
+    async def page(self):
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def close(self):
+        for page in self._pages:
+            if not page.is_closed():
+                await page.close()
+        self._pages = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+class CrawlArchive:
+    """HAR 1.2 archive of the HTTP fast path's responses, for offline record/replay"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            har = json.load(f)
+        self.entries = {entry["request"]["url"]: entry for entry in har["log"]["entries"]}
+        logger.info(f"Loaded {len(self.entries)} archived responses from {self.path}")
+
+    def record(self, url, response, elapsed_ms):
+        """Store a live response under the URL it was requested with"""
+        content_type = response.headers.get('Content-Type', '')
+        self.entries[url] = {
+            "startedDateTime": datetime.now().astimezone().isoformat(),
+            "time": elapsed_ms,
+            "request": {
+                "method": "GET",
+                "url": url,
+                "httpVersion": "HTTP/1.1",
+                "headers": [],
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": 0
+            },
+            "response": {
+                "status": response.status_code,
+                "statusText": response.reason or "",
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": name, "value": value} for name, value in response.headers.items()],
+                "cookies": [],
+                "content": {
+                    "size": len(response.content),
+                    "mimeType": content_type,
+                    "text": base64.b64encode(response.content).decode('ascii'),
+                    "encoding": "base64"
+                },
+                "redirectURL": "",
+                "headersSize": -1,
+                "bodySize": len(response.content),
+                # Final URL after redirects, which relative links resolve against
+                "_url": response.url
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": elapsed_ms, "receive": 0}
+        }
+
+    def replay(self, url):
+        """Rebuild the archived response for url; raises ConnectionError when it was never recorded"""
+        entry = self.entries.get(url)
+        if entry is None:
+            raise requests.ConnectionError(f"Not in crawl archive: {url}")
+
+        archived = entry["response"]
+        response = requests.Response()
+        response.status_code = archived["status"]
+        response.reason = archived["statusText"]
+        response.headers = requests.structures.CaseInsensitiveDict(
+            (header["name"], header["value"]) for header in archived["headers"])
+        response._content = base64.b64decode(archived["content"]["text"])
+        response.url = archived.get("_url", url)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        return response
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        har = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "RoyalBayviewExtractor", "version": "1.0"},
+                "entries": list(self.entries.values())
+            }
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(har, f, ensure_ascii=False)
+        logger.info(f"Recorded {len(self.entries)} responses to {self.path}")
+
+class CachedRecord:
+    """Extracted record reused from the crawl state because the page has not changed"""
+
+    def __init__(self, url, record):
+        self.url = url
+        self.record = record
+
+class StaticPage:
+    """A page fetched over plain HTTP: its server-rendered HTML plus the decoded Nuxt state"""
+
+    def __init__(self, url, soup, states):
+        self.url = url
+        self.soup = soup
+        self.states = states
+        for tag in self.soup(NON_RENDERED_TAGS):
+            tag.decompose()
+
+    def query(self, spec):
+        """Run an EXTRACT_SPEC_JS selector spec against the server-rendered HTML"""
+        result = {}
+        for name, group in spec.items():
+            items = []
+            for selector in group["selectors"]:
+                try:
+                    elements = self.soup.select(selector)
+                except Exception:
+                    continue
+                for element in elements:
+                    item = {}
+                    if group.get("text"):
+                        item["text"] = element.get_text("\n", strip=True)
+                    for attr in group.get("attrs", []):
+                        value = element.get(attr)
+                        # BeautifulSoup splits multi-valued attributes such as class
+                        item[attr] = ' '.join(value) if isinstance(value, list) else value
+                    items.append(item)
+            result[name] = items
+        return result
+
 class RoyalBayviewExtractor:
-    def __init__(self, base_url="https://www.tridel.com/royalbayview/", output_dir="output"):
+    def __init__(self, base_url="https://www.tridel.com/royalbayview/", output_dir="output", concurrency=4,
+                 readiness_timeouts=None, page_policies=None, backend="auto", incremental=True,
+                 archive_mode=None, archive_dir=None, max_depth=3, max_pages=200, browser=None, politeness=None,
+                 browser_cache_dir=None, browser_cache_mb=500, memo_mb=64, media_queue=None):
         self.base_url = base_url
+        # Thread-safe queue that receives ("image" | "video" | "document", asset) as soon as the
+        # landing page's assets are known, then None when the crawl ends (see media_pipeline.py)
+        self.media_queue = media_queue
+        # Persistent, size-bounded browser profile per site; None renders with an empty cache.
+        # Playwright turns Chromium's HTTP cache off for any page or context with a route, so the
+        # cache only serves hits when nothing is routed: no response memo and "full" page policies.
+        self.browser_cache = BrowserCache(browser_cache_dir, base_url, browser_cache_mb) if browser_cache_dir else None
+        if self.browser_cache is not None:
+            if archive_mode:
+                logger.warning("HAR record/replay routes every request, so the browser cache will not serve hits")
+            logger.info("Browser cache enabled: resource blocking and the response memo are off so cached "
+                        "responses can be used")
+            memo_mb = 0
+        # In-memory LRU of content-hashed bundles and images shared by every page of the crawl.
+        # HAR record/replay must see every request, so memoization is off in those modes.
+        self.response_memo = ResponseMemo(memo_mb) if memo_mb and not archive_mode else None
+        # A running Playwright browser shared by several crawls; None launches a private one
+        self.browser = browser
+        # Per-host rate limiter shared by several crawls (see crawl_projects.HostRateLimiter)
+        self.politeness = politeness
+        # Pages still to crawl; one visited set for the whole run, scoped to the project directory
+        self.frontier = CrawlFrontier(base_url, max_depth=max_depth, max_pages=max_pages)
+        # None: live crawl, "record": live crawl saved to archive_dir, "replay": serve the crawl
+        # from archive_dir without touching the network
+        self.archive_mode = archive_mode
+        self.archive_dir = Path(archive_dir or Path(output_dir) / "crawl_archive")
+        self.http_archive = CrawlArchive(self.archive_dir / "http.har") if archive_mode else None
+        if archive_mode == "replay":
+            self.http_archive.load()
+        # One entry per HTTP fetch: URL, status, bytes and latency
+        self.fetch_log = []
+        self.run_stats = {}
+        # Timed spans of every crawl step, saved as a Chrome trace
+        self.trace = CrawlTrace()
+        # Requests and bytes the browser context transferred, summed over the run
+        self.browser_traffic = {"requests": 0, "failed": 0, "bytes": 0}
+        # Open page -> resource_log entry of its current load, for per-page traffic
+        self._page_loads = {}
+        # Revalidate pages with conditional GETs and reuse records of unchanged pages. A recording
+        # must hold every page's full response and Nuxt state, and a replay measures the full
+        # extraction, so both always fetch and extract afresh.
+        self.incremental = incremental and not archive_mode
+        # "auto": HTTP fast path with browser fallback, "http": never launch a browser,
+        # "browser": render every page with Playwright
+        self.backend = backend
+        # Futures of decoded Nuxt state scripts by URL; state.js is shared by every page of a site,
+        # so concurrent fetch threads wait on the first one's fetch instead of repeating it
+        self.nuxt_state_cache = {}
+        self._nuxt_state_lock = threading.Lock()
+        # Maximum number of pages crawled in parallel
+        self.concurrency = concurrency
+        self.readiness_timeouts = {**READINESS_TIMEOUTS, **(readiness_timeouts or {})}
+        # One entry per page load: which signals fired and how long the wait took
+        self.readiness_log = []
+        # Map page types to RESOURCE_POLICIES names; set a type to "full" to load everything
+        self.page_policies = {**PAGE_POLICIES, **(page_policies or {})}
+        if self.browser_cache is not None:
+            # Blocking requests would route the page and switch its HTTP cache off
+            self.page_policies = {page_type: "full" for page_type in self.page_policies}
+        # One entry per page load: requests aborted by the routing policy
+        self.resource_log = []
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Every extracted page, asset and link is streamed here as soon as it is merged
+        self.records = RecordStream(self.output_dir / RECORDS_FILENAME)
+
+        # Per-URL validators, content hashes and extracted records from earlier runs
+        self.crawl_state_file = self.output_dir / "crawl_state.json"
+        self.crawl_state = self.load_crawl_state()
+        # Page URL -> "new", "changed", "unchanged" or "rendered" (browser pages are not revalidated)
+        self.page_changes = {}
+
         # Create subdirectories for different content types
         self.media_dir = self.output_dir / "media"
         self.media_dir.mkdir(exist_ok=True)
         self.docs_dir = self.output_dir / "documents"
         self.docs_dir.mkdir(exist_ok=True)
 
-        # Track visited URLs and extracted content
-        self.visited_urls = set()
+        # Track extracted content
         self.extracted_data = {
             "project_overview": "",
             "location_details": "",
@@ -56,310 +428,964 @@ class RoyalBayviewExtractor:
         }
 
     async def extract_website_content(self):
-        """Main extraction method using Playwright"""
-        async with async_playwright() as p:
-            # Launch browser
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            )
-
+        """Main extraction method: HTTP fast path first, Playwright for whatever it could not handle"""
+        start = time.perf_counter()
+        try:
+            self.records.open()
+            self.records.emit("run_start", {"base_url": self.base_url, "started": self.extracted_data["last_updated"]})
+            with self.trace.span("crawl", "run", backend=self.backend):
+                await self.crawl_site()
+        finally:
             try:
-                # Start with main page
-                await self.extract_main_page(context)
-
-                # Extract linked content
-                await self.extract_linked_content(context)
-
-                # Extract media assets
-                await self.extract_media_assets(context)
-
-                # Extract documents and downloads
-                await self.extract_documents(context)
-
-                # Extract pricing and floor plans
-                await self.extract_pricing_floorplans(context)
-
-                # Mark extraction as complete
-                self.extracted_data["extraction_completeness"] = "completed"
-
+                # Link flags are final only once the crawl is over
+                for link_info in self.extracted_data["linked_content"]:
+                    link_info["extracted"] = self.frontier.is_visited(link_info["url"])
+                    self.records.emit("link", link_info, link_info["url"])
+                self.records.emit("run_end", {
+                    "extraction_completeness": self.extracted_data["extraction_completeness"],
+                    "last_updated": self.extracted_data["last_updated"]
+                })
+                self.records.close()
             finally:
-                await browser.close()
-
-    async def extract_main_page(self, context):
-        """Extract content from the main page"""
-        logger.info(f"Extracting main page: {self.base_url}")
-        page = await context.new_page()
-
-        try:
-            await page.goto(self.base_url, wait_until='networkidle')
-            await page.wait_for_timeout(2000)  # Wait for dynamic content
-
-            # Extract project overview
-            overview_selectors = [
-                'h1', '.hero-title', '.project-title', '.main-title',
-                '[class*="title"]', '[class*="headline"]', '.tagline'
-            ]
+                if self.media_queue is not None:
+                    # The record stream is complete (or failed), so the downloader can move on;
+                    # it must never be left waiting on the queue
+                    self.media_queue.put(None)
+
+            if self.archive_mode == "record":
+                self.http_archive.save()
+            self.run_stats = self.build_run_stats(time.perf_counter() - start)
+            logger.info(f"Crawl took {self.run_stats['wall_time_s']} s: {self.run_stats['http']['fetches']} HTTP fetches "
+                        f"(p50 {self.run_stats['http']['latency_ms']['p50']} ms), "
+                        f"{self.run_stats['browser']['pages']} browser pages")
+
+    async def crawl_site(self):
+        """Run the HTTP fast path, then render whatever it left with Playwright"""
+        self.frontier.mark_visited(self.base_url)
+        async with self.polite(self.base_url):
+            await asyncio.to_thread(self.frontier.seed_from_sitemap, self.fetch_sitemap)
+
+        # Work left for the browser: the landing page and frontier entries the fast path could not read
+        browser_work = {"landing": True, "linked": []}
+
+        if self.backend != "browser":
+            browser_work = await self.extract_static_content()
+            needs_browser = browser_work["landing"] or browser_work["linked"]
+
+            if not needs_browser:
+                self.extracted_data["extraction_completeness"] = "completed"
+                return
+            if self.backend == "http" or (async_playwright is None and self.browser is None):
+                logger.warning(f"Pages left unextracted without a browser: landing={browser_work['landing']}, "
+                               f"linked={[entry.url for entry in browser_work['linked']]}")
+                self.extracted_data["extraction_completeness"] = "partial"
+                return
+
+        if async_playwright is None and self.browser is None:
+            raise RuntimeError("Playwright is not installed; use backend='http' or install playwright")
+
+        await self.extract_with_browser(browser_work)
+
+    async def extract_with_browser(self, browser_work):
+        """Render the pages named in browser_work with Playwright"""
+        if self.browser is not None:
+            if self.browser_cache is not None:
+                logger.warning("A persistent browser cache needs its own browser; rendering without it")
+            # The browser is shared with other crawls; this crawl only owns its context
+            await self.render_with_browser(self.browser, browser_work)
+            return
 
-            project_overview = ""
-            for selector in overview_selectors:
+        async with async_playwright() as p:
+            if self.browser_cache is not None:
+                # A persistent context is its own browser, so launching it opens the site's profile
+                with self.trace.span("launch", "browser", cache=str(self.browser_cache.profile_dir)):
+                    context = await p.chromium.launch_persistent_context(
+                        headless=True,
+                        viewport={'width': 1920, 'height': 1080},
+                        user_agent=USER_AGENT,
+                        **self.browser_cache.launch_options()
+                    )
                 try:
-                    elements = await page.query_selector_all(selector)
-                    for element in elements:
-                        text = await element.inner_text()
-                        if text and len(text.strip()) > 10:
-                            project_overview += text.strip() + " "
-                except:
-                    continue
+                    await self.render_in_context(context, browser_work)
+                finally:
+                    with self.trace.span("close browser", "browser"):
+                        await context.close()
+                    self.browser_cache.finish_run()
+                return
 
-            self.extracted_data["project_overview"] = project_overview.strip()
-
-            # Extract contact information
-            contact_selectors = [
-                '.contact', '.phone', '[class*="phone"]', '[class*="contact"]',
-                'a[href^="tel:"]', '.sales-info'
-            ]
+            # Launch browser
+            with self.trace.span("launch", "browser"):
+                browser = await p.chromium.launch(headless=True)
+            try:
+                await self.render_with_browser(browser, browser_work)
+            finally:
+                with self.trace.span("close browser", "browser"):
+                    await browser.close()
 
-            contact_info = {}
-            for selector in contact_selectors:
+    async def render_with_browser(self, browser, browser_work):
+        """Render browser_work in a fresh, isolated context of a running browser"""
+        with self.trace.span("new context", "browser"):
+            context = await browser.new_context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent=USER_AGENT
+            )
+        try:
+            await self.render_in_context(context, browser_work)
+        finally:
+            # The recorded HAR is only written when its context closes
+            with self.trace.span("close context", "browser"):
+                await context.close()
+
+    async def render_in_context(self, context, browser_work):
+        """Run the landing and linked passes the fast path left over in a browser context"""
+        context.on("requestfinished", self.on_request_finished)
+        context.on("requestfailed", self.on_request_failed)
+
+        if self.archive_mode == "record":
+            await context.route_from_har(self.archive_dir / "browser.har", update=True, update_content="embed")
+        elif self.archive_mode == "replay":
+            await context.route_from_har(self.archive_dir / "browser.har", not_found="abort")
+        if self.response_memo is not None:
+            # Page-level resource policies run first and fall back to this route for allowed requests
+            await context.route("**/*", self.response_memo.handle)
+
+        if browser_work["landing"]:
+            self.page_changes[self.base_url] = "rendered"
+            # Render the landing page once and run every landing-page pass against it
+            with self.trace.span("page", "browser", url=self.base_url):
+                landing = await self.open_landing_page(context)
                 try:
-                    elements = await page.query_selector_all(selector)
-                    for element in elements:
-                        text = await element.inner_text()
-                        if text:
-                            # Extract phone numbers
-                            phones = re.findall(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text)
-                            if phones:
-                                contact_info["phone"] = phones[0]
-                            contact_info["text"] = text.strip()
-                except:
-                    continue
+                    # Start with main page
+                    await self.extract_main_page(context, landing)
+
+                    # Extract media assets
+                    await self.extract_media_assets(context, landing)
+
+                    # Extract documents and downloads
+                    await self.extract_documents(context, landing)
+                    self._emit_landing_records()
+                finally:
+                    await self.close_page(landing)
+            self._queue_landing_links()
+
+        # Extract linked content, including pricing and floor plan pages
+        await self.extract_linked_content(context, browser_work["linked"])
+
+        # Mark extraction as complete
+        self.extracted_data["extraction_completeness"] = "completed"
+
+        waited_ms = sum(entry["elapsed_ms"] for entry in self.readiness_log)
+        timed_out = sum(1 for entry in self.readiness_log if entry["timed_out"])
+        logger.info(f"Readiness waits: {len(self.readiness_log)} pages, {waited_ms} ms total, {timed_out} timed out")
+
+        blocked = sum(entry["blocked"] for entry in self.resource_log)
+        saved_kb = sum(entry["est_bytes_saved"] for entry in self.resource_log) / 1024
+        logger.info(f"Resource policies: {blocked} requests blocked, ~{saved_kb:.0f} KB saved")
+        logger.info(f"Browser traffic: {self.browser_traffic['requests']} requests, "
+                    f"{self.browser_traffic['bytes'] / 1024:.0f} KB, {self.browser_traffic['failed']} failed or blocked")
+        if self.response_memo is not None:
+            memo = self.response_memo.stats
+            logger.info(f"Response memo: {memo['hits']} network requests avoided "
+                        f"(~{memo['bytes_served'] / 1024:.0f} KB), {memo['misses']} fetched, {memo['evicted']} evicted")
+
+    async def on_request_finished(self, request):
+        """Add a finished browser request to the run's and its page load's traffic totals"""
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            sizes = {}
+        size = max(0, sizes.get("responseBodySize", 0)) + max(0, sizes.get("responseHeadersSize", 0))
+
+        self.browser_traffic["requests"] += 1
+        self.browser_traffic["bytes"] += size
+        load = self._request_load(request)
+        if load is not None:
+            load["requests"] += 1
+            load["bytes"] += size
+        self.trace.counter("browser traffic", requests=self.browser_traffic["requests"],
+                           kb=round(self.browser_traffic["bytes"] / 1024))
+
+    def on_request_failed(self, request):
+        """Count a browser request that failed or was aborted by a resource policy"""
+        self.browser_traffic["failed"] += 1
+        load = self._request_load(request)
+        if load is not None:
+            load["failed"] += 1
+
+    def _request_load(self, request):
+        """resource_log entry of the page load a request belongs to, if known"""
+        try:
+            return self._page_loads.get(request.frame.page)
+        except Exception:
+            # Service worker requests have no frame
+            return None
 
-            self.extracted_data["contact_info"] = contact_info
+    async def new_page(self, context):
+        """Open a page, metering its cache hits when rendering with a persistent cache"""
+        page = await context.new_page()
+        if self.browser_cache is not None and self.browser is None:
+            await self.browser_cache.meter(context, page)
+        return page
 
-            # Extract value propositions
-            value_props = []
-            value_selectors = [
-                '.value-prop', '.benefit', '.feature', '[class*="benefit"]',
-                '.highlight', '.key-point', 'li', 'p'
-            ]
+    async def close_page(self, page):
+        with self.trace.span("close", "browser"):
+            self._page_loads.pop(page, None)
+            await page.close()
 
-            for selector in value_selectors:
-                try:
-                    elements = await page.query_selector_all(selector)
-                    for element in elements:
-                        text = await element.inner_text()
-                        if text and len(text.strip()) > 20 and len(text.strip()) < 200:
-                            value_props.append(text.strip())
-                except:
+    async def extract_static_content(self):
+        """Extract every page reachable over plain HTTP and return the work left for the browser"""
+        logger.info("Extracting server-rendered pages over HTTP...")
+        remaining = {"landing": False, "linked": []}
+
+        # The landing page must carry Nuxt state: its video players are only rendered client-side
+        async with self.polite(self.base_url):
+            landing = await asyncio.to_thread(self.fetch_static_page, self.base_url, True)
+        if landing is None:
+            # Links are discovered on the landing page, so the browser crawls whatever it links to
+            remaining["landing"] = True
+        elif isinstance(landing, CachedRecord):
+            self._apply_landing_record(landing.record)
+            self._emit_landing_records()
+        else:
+            await self.extract_main_page(None, landing)
+            await self.extract_media_assets(None, landing)
+            await self.extract_documents(None, landing)
+            self.store_record(self.base_url, self._landing_record())
+            self._emit_landing_records()
+        if landing is not None:
+            self._queue_landing_links()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(url):
+            async with semaphore, self.polite(url):
+                return await asyncio.to_thread(self.fetch_static_page, url)
+
+        # Crawl the frontier level by level; links found on each level are queued for the next
+        batch = self.frontier.pop_batch()
+        while batch:
+            pages = await asyncio.gather(*(fetch(entry.url) for entry in batch))
+            for entry, page in zip(batch, pages):
+                if page is None:
+                    remaining["linked"].append(entry)
                     continue
-
-            self.extracted_data["value_propositions"] = list(set(value_props))[:10]  # Limit to 10 unique items
-
-            # Get all links for further exploration
-            links = await page.query_selector_all('a[href]')
-            for link in links:
-                href = await link.get_attribute('href')
-                if href:
-                    full_url = urljoin(self.base_url, href)
-                    if self.is_internal_url(full_url):
-                        self.extracted_data["linked_content"].append({
-                            "url": full_url,
-                            "text": await link.inner_text(),
-                            "extracted": False
-                        })
+                if isinstance(page, CachedRecord):
+                    result = page.record
+                else:
+                    result = await self.scrape_page(page, entry.url)
+                    self.store_record(entry.url, result)
+                self._merge_page_result(result)
+                self.frontier.add_links(result["links"], entry)
+            batch = self.frontier.pop_batch()
+
+        logger.info(f"HTTP fast path done; browser needed for landing={remaining['landing']}, "
+                    f"linked={len(remaining['linked'])}")
+        return remaining
+
+    def fetch_static_page(self, url, require_state=False):
+        """Fetch a server-rendered page and its Nuxt state
+
+        Returns a StaticPage to extract from, a CachedRecord when the page is unchanged
+        since the last run, or None when the page needs a browser.
+        """
+        try:
+            previous = self.crawl_state["pages"].get(url, {}) if self.incremental else {}
+            has_record = previous.get("record") is not None
+
+            headers = {'User-Agent': USER_AGENT}
+            if has_record and previous.get("etag"):
+                headers['If-None-Match'] = previous["etag"]
+            if has_record and previous.get("last_modified"):
+                headers['If-Modified-Since'] = previous["last_modified"]
+
+            response = self.http_get(url, headers)
+            if response.status_code == 304 and has_record:
+                self.page_changes[url] = "unchanged"
+                self.crawl_state["pages"][url]["checked_at"] = datetime.now().isoformat()
+                return CachedRecord(url, previous["record"])
+
+            # 4xx pages are rendered by the server like any other; only server errors fall back
+            if response.status_code >= 500:
+                response.raise_for_status()
+
+            # Servers without validators still let us skip re-extraction when the body is identical
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            unchanged = previous.get("content_hash") == content_hash
+            self.page_changes[url] = "unchanged" if unchanged else ("changed" if previous else "new")
+            self.crawl_state["pages"][url] = {
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "content_hash": content_hash,
+                "checked_at": datetime.now().isoformat(),
+                "record": previous.get("record") if unchanged else None
+            }
+            if unchanged and has_record:
+                return CachedRecord(url, previous["record"])
+            if 'html' not in response.headers.get('Content-Type', ''):
+                logger.info(f"Not an HTML page, needs a browser: {url}")
+                return None
+
+            with self.trace.span("parse", "http", url=url):
+                soup = BeautifulSoup(response.text, 'html.parser')
+            root = soup.find(id='__nuxt')
+            if root is None or root.get('data-server-rendered') != 'true':
+                logger.info(f"Page is not server-rendered, needs a browser: {url}")
+                return None
+
+            states = self.load_nuxt_state(soup, response.url)
+            if require_state and not states:
+                logger.info(f"No Nuxt state found, needs a browser: {url}")
+                return None
+
+            return StaticPage(url, soup, states)
 
         except Exception as e:
-            logger.error(f"Error extracting main page: {e}")
-        finally:
-            await page.close()
-
-    async def extract_linked_content(self, context):
-        """Extract content from linked pages"""
-        logger.info("Extracting linked content...")
+            logger.warning(f"HTTP fast path failed for {url}: {e}")
+            return None
+
+    def http_get(self, url, headers):
+        """GET over the network or from the crawl archive, logging latency and size"""
+        start = time.perf_counter()
+        with self.trace.span("fetch", "http", url=url) as span:
+            if self.archive_mode == "replay":
+                response = self.http_archive.replay(url)
+            else:
+                response = requests.get(url, timeout=30, headers=headers)
+            span.update(status=response.status_code, bytes=len(response.content))
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        if self.archive_mode == "record":
+            self.http_archive.record(url, response, elapsed_ms)
+        self.fetch_log.append({
+            "url": url,
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "elapsed_ms": elapsed_ms
+        })
+        return response
+
+    def polite(self, url):
+        """Politeness slot for a request to url's host, or a no-op for a standalone crawl"""
+        return self.politeness.slot(url) if self.politeness is not None else nullcontext()
+
+    def fetch_sitemap(self, url):
+        """Text of a sitemap, or None when the site does not serve one"""
+        try:
+            response = self.http_get(url, {'User-Agent': USER_AGENT})
+            if response.status_code == 200:
+                return response.text
+            logger.info(f"No sitemap at {url} (HTTP {response.status_code})")
+        except Exception as e:
+            logger.info(f"No sitemap at {url}: {e}")
+        return None
+
+    def build_run_stats(self, wall_time):
+        """Throughput and latency figures for the crawl just finished"""
+        latencies = [entry["elapsed_ms"] for entry in self.fetch_log]
+        waits = [entry["elapsed_ms"] for entry in self.readiness_log]
+        pages = len(self.page_changes)
+        return {
+            "archive_mode": self.archive_mode or "live",
+            "backend": self.backend,
+            "wall_time_s": round(wall_time, 3),
+            "pages": pages,
+            "pages_per_s": round(pages / wall_time, 2) if wall_time else 0,
+            "frontier": self.frontier.stats(),
+            "browser_cache": self.browser_cache.last_run if self.browser_cache else None,
+            "response_memo": self.response_memo.summary() if self.response_memo else None,
+            "http": {
+                "fetches": len(self.fetch_log),
+                "bytes": sum(entry["bytes"] for entry in self.fetch_log),
+                "latency_ms": {
+                    "p50": percentile(latencies, 50, default=0),
+                    "p95": percentile(latencies, 95, default=0),
+                    "max": max(latencies, default=0)
+                }
+            },
+            "browser": {
+                "pages": len(self.readiness_log),
+                **self.browser_traffic,
+                "readiness_ms": {
+                    "p50": percentile(waits, 50, default=0),
+                    "p95": percentile(waits, 95, default=0),
+                    "max": max(waits, default=0)
+                }
+            }
+        }
 
-        # Define key pages to visit
-        key_pages = [
-            "/amenities",
-            "/neighbourhood",
-            "/prices-floorplans",
-            "/floorplans",
-            "/about",
-            "/gallery",
-            "/features",
-            "/location",
-            "/contact"
-        ]
-
-        for page_path in key_pages:
-            url = urljoin(self.base_url, page_path)
-            await self.extract_page_content(context, url)
-
-        # Also visit links found on main page
+    def load_crawl_state(self):
+        """Load the crawl state left by the previous run, or an empty one"""
+        if self.incremental and self.crawl_state_file.exists():
+            try:
+                with open(self.crawl_state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get("version") == CRAWL_STATE_VERSION:
+                    return state
+                logger.info(f"Crawl state {self.crawl_state_file} is from an older format; starting fresh")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable crawl state {self.crawl_state_file}: {e}")
+        return {"version": CRAWL_STATE_VERSION, "pages": {}, "media_assets": {}}
+
+    def store_record(self, url, record):
+        """Keep a page's freshly extracted record for reuse by the next run"""
+        if url in self.crawl_state["pages"]:
+            self.crawl_state["pages"][url]["record"] = copy.deepcopy(record)
+
+    def _landing_record(self):
+        """Everything the landing-page passes contribute to extracted_data"""
+        return copy.deepcopy({
+            "project_overview": self.extracted_data["project_overview"],
+            "contact_info": self.extracted_data["contact_info"],
+            "value_propositions": self.extracted_data["value_propositions"],
+            "linked_content": self.extracted_data["linked_content"],
+            "media_assets": self.extracted_data["media_assets"]
+        })
+
+    def _apply_landing_record(self, record):
+        self.extracted_data.update(copy.deepcopy(record))
+
+    def _emit_landing_records(self):
+        """Stream the landing page's overview and each media asset it found"""
+        self.records.emit("overview", {
+            "project_overview": self.extracted_data["project_overview"],
+            "contact_info": self.extracted_data["contact_info"],
+            "value_propositions": self.extracted_data["value_propositions"]
+        }, self.base_url)
+        for record_type, media_type in (("image", "images"), ("video", "videos"), ("document", "documents")):
+            for item in self.extracted_data["media_assets"][media_type]:
+                self.records.emit(record_type, item, item["url"])
+                if self.media_queue is not None:
+                    self.media_queue.put((record_type, item))
+
+    def _queue_landing_links(self):
+        """Seed the frontier with every link found on the landing page"""
         for link_info in self.extracted_data["linked_content"]:
-            if not link_info["extracted"]:
-                await self.extract_page_content(context, link_info["url"])
-                link_info["extracted"] = True
-
-    async def extract_page_content(self, context, url):
-        """Extract content from a specific page"""
-        if url in self.visited_urls:
-            return
+            self.frontier.add(link_info["url"], depth=1)
+
+    def build_change_set(self):
+        """Compare this run against the previous crawl state: pages, images, videos and documents"""
+        previous_pages = set(self.crawl_state.get("previous_pages", []))
+        change_set = {
+            "crawl_date": datetime.now().isoformat(),
+            "pages": {
+                status: sorted(url for url, page_status in self.page_changes.items() if page_status == status)
+                for status in ("new", "changed", "unchanged", "rendered")
+            }
+        }
+        change_set["pages"]["removed"] = sorted(previous_pages - set(self.page_changes))
+
+        # Contentful and CDN URLs embed a content hash, so a changed asset shows up as a new URL
+        for media_type in ("images", "videos", "documents"):
+            current = {item["url"] for item in self.extracted_data["media_assets"][media_type]}
+            previous = set(self.crawl_state["media_assets"].get(media_type, []))
+            change_set[media_type] = {
+                "added": sorted(current - previous),
+                "removed": sorted(previous - current)
+            }
+        return change_set
+
+    def save_crawl_state(self):
+        """Persist validators, hashes and records for the next incremental run"""
+        self.crawl_state["previous_pages"] = sorted(self.page_changes)
+        self.crawl_state["media_assets"] = {
+            media_type: sorted({item["url"] for item in items})
+            for media_type, items in self.extracted_data["media_assets"].items()
+        }
+        with open(self.crawl_state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.crawl_state, f, indent=2, ensure_ascii=False)
+
+    def load_nuxt_state(self, soup, page_url):
+        """Decode the inline or script-referenced Nuxt state of a page"""
+        states = []
+
+        inline = find_inline_state(soup)
+        if inline:
+            with self.trace.span("decode state", "http", url=page_url):
+                states.append(decode_nuxt_state(inline))
+
+        for state_url in find_state_urls(soup, page_url):
+            states.append(self.load_state_script(state_url))
+
+        return states
+
+    def load_state_script(self, state_url):
+        """Fetch and decode a Nuxt state script once per run, however many threads ask for it"""
+        with self._nuxt_state_lock:
+            future = self.nuxt_state_cache.get(state_url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.nuxt_state_cache[state_url] = future
+        if not owner:
+            return future.result()
 
-        logger.info(f"Extracting page: {url}")
-        page = await context.new_page()
+        try:
+            response = self.http_get(state_url, {'User-Agent': USER_AGENT})
+            response.raise_for_status()
+            with self.trace.span("decode state", "http", url=state_url):
+                state = decode_nuxt_state(response.text)
+        except Exception as e:
+            # Threads already waiting see the failure; later pages may try again
+            with self._nuxt_state_lock:
+                del self.nuxt_state_cache[state_url]
+            future.set_exception(e)
+            raise
+        future.set_result(state)
+        return state
+
+    async def navigate(self, page, url, page_type, selectors=(), images=False):
+        """Load url and wait for concrete readiness signals instead of fixed sleeps"""
+        stats = await self.apply_resource_policy(page, url, self.page_policies.get(page_type, "full"))
+        self._page_loads[page] = stats
+        with self.trace.span("goto", "browser", url=url):
+            async with self.polite(url):
+                await page.goto(url, wait_until='domcontentloaded')
+        with self.trace.span("ready", "browser", url=url, page_type=page_type):
+            await self.wait_until_ready(page, url, page_type, selectors, images)
+        if stats["blocked"]:
+            logger.info(f"Blocked {stats['blocked']} requests (~{stats['est_bytes_saved'] / 1024:.0f} KB) on {url}")
+
+    async def apply_resource_policy(self, page, url, policy_name):
+        """Route the page's requests through a resource policy and return this load's stats"""
+        # Pooled pages are reused across URLs, so drop the previous load's handler first
+        await page.unroute("**/*")
+
+        stats = {
+            "url": url,
+            "policy": policy_name,
+            "blocked": 0,
+            "blocked_by_type": {},
+            "est_bytes_saved": 0,
+            # Filled in by the context's request listeners as the load progresses
+            "requests": 0,
+            "failed": 0,
+            "bytes": 0
+        }
+        self.resource_log.append(stats)
+
+        policy = RESOURCE_POLICIES[policy_name]
+        if policy is None:
+            return stats
+
+        async def handle(route):
+            request = route.request
+            if self.is_allowed_resource(request, policy):
+                # Fall through to context-level routes such as HAR replay
+                await route.fallback()
+                return
+
+            resource_type = request.resource_type
+            stats["blocked"] += 1
+            stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+            stats["est_bytes_saved"] += ESTIMATED_RESOURCE_BYTES.get(resource_type, ESTIMATED_RESOURCE_BYTES["other"])
+            await route.abort()
+
+        await page.route("**/*", handle)
+        return stats
+
+    def is_allowed_resource(self, request, policy):
+        """Check a request against a RESOURCE_POLICIES entry"""
+        if request.resource_type not in policy["allow_types"]:
+            return False
+        if policy["first_party_only"] and not self.is_first_party_url(request.url):
+            return False
+        return True
+
+    async def wait_until_ready(self, page, url, page_type, selectors=(), images=False):
+        """Wait for hydration, target selectors and images within the page type's timeout"""
+        timeout_ms = self.readiness_timeouts.get(page_type, READINESS_TIMEOUTS["linked"])
+        start = time.perf_counter()
+        deadline = start + timeout_ms / 1000
+
+        checks = [("hydrated", page.wait_for_function, NUXT_READY_JS, {})]
+        if selectors:
+            checks.append(("selectors", page.wait_for_selector, ", ".join(selectors), {"state": "attached"}))
+        if images:
+            checks.append(("images", page.wait_for_function, IMAGES_READY_JS, {}))
+
+        signals = {}
+        timed_out = False
+        for name, wait, target, options in checks:
+            # Playwright treats a timeout of 0 as "wait forever", so never pass less than 1 ms
+            remaining_ms = max(1, (deadline - time.perf_counter()) * 1000)
+            try:
+                await wait(target, timeout=remaining_ms, **options)
+                signals[name] = round((time.perf_counter() - start) * 1000)
+            except PlaywrightTimeoutError:
+                # Extract whatever has rendered rather than failing the page
+                signals[name] = None
+                timed_out = True
+                break
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000)
+        self.readiness_log.append({
+            "url": url,
+            "page_type": page_type,
+            "elapsed_ms": elapsed_ms,
+            "timeout_ms": timeout_ms,
+            "signals": signals,
+            "timed_out": timed_out
+        })
+        if timed_out:
+            logger.warning(f"Readiness wait timed out after {elapsed_ms} ms: {url}")
+        else:
+            logger.debug(f"Page ready in {elapsed_ms} ms: {url}")
 
+    async def open_landing_page(self, context):
+        """Open a page on base_url and wait for its dynamic content to render"""
+        page = await self.new_page(context)
         try:
-            await page.goto(url, wait_until='networkidle')
-            await page.wait_for_timeout(1000)
-            self.visited_urls.add(url)
+            await self.navigate(page, self.base_url, "landing", selectors=['h1', 'a[href]'], images=True)
+        except Exception as e:
+            logger.error(f"Error loading landing page {self.base_url}: {e}")
+        return page
+
+    @asynccontextmanager
+    async def landing_page(self, context, page=None):
+        """Yield the shared landing page snapshot, or load and close a private one"""
+        if page is not None:
+            yield page
+            return
 
-            # Extract amenities
-            amenity_selectors = [
-                '.amenity', '.amenities', '[class*="amenit"]',
-                '.feature', '.facility', 'li'
-            ]
+        page = await self.open_landing_page(context)
+        try:
+            yield page
+        finally:
+            await self.close_page(page)
+
+    async def query_page(self, page, spec):
+        """Run a declarative selector spec in the page and return all matches in one round trip
+
+        spec maps a group name to {"selectors": [...], "text": bool, "attrs": [...]}; the result
+        maps the same names to lists of {"text": ..., <attr>: ...} dicts in selector order.
+        """
+        cat = "http" if isinstance(page, StaticPage) else "browser"
+        start_us = self.trace.now_us()
+        if isinstance(page, StaticPage):
+            results = {}
+            for name, group in spec.items():
+                with self.trace.span(f"query {name}", cat, url=page.url):
+                    results.update(page.query({name: group}))
+        else:
+            with self.trace.span("evaluate", cat, url=page.url, groups=list(spec)):
+                results = await page.evaluate(EXTRACT_SPEC_JS, spec)
+            # Lay the in-page group timings out back to back from the start of the round trip
+            offset_us = start_us
+            for name, elapsed_ms in results.pop("__timings", {}).items():
+                duration_us = round(elapsed_ms * 1000)
+                self.trace.add_span(f"query {name}", cat, offset_us, duration_us, url=page.url, measured_in="page")
+                offset_us += duration_us
+        return results
+
+    async def extract_main_page(self, context, page=None):
+        """Extract content from the main page"""
+        logger.info(f"Extracting main page: {self.base_url}")
+        async with self.landing_page(context, page) as page:
+            try:
+                results = await self.query_page(page, {
+                    "overview": {
+                        "selectors": ['h1', '.hero-title', '.project-title', '.main-title',
+                                      '[class*="title"]', '[class*="headline"]', '.tagline'],
+                        "text": True
+                    },
+                    "contact": {
+                        "selectors": ['.contact', '.phone', '[class*="phone"]', '[class*="contact"]',
+                                      'a[href^="tel:"]', '.sales-info'],
+                        "text": True
+                    },
+                    "value": {
+                        "selectors": ['.value-prop', '.benefit', '.feature', '[class*="benefit"]',
+                                      '.highlight', '.key-point', 'li', 'p'],
+                        "text": True
+                    },
+                    "links": {"selectors": ['a[href]'], "text": True, "attrs": ['href']}
+                })
+
+                # Extract project overview
+                project_overview = ""
+                for element in results["overview"]:
+                    text = element["text"]
+                    if text and len(text.strip()) > 10:
+                        project_overview += text.strip() + " "
+
+                self.extracted_data["project_overview"] = project_overview.strip()
+
+                # Extract contact information
+                contact_info = {}
+                for element in results["contact"]:
+                    text = element["text"]
+                    if text:
+                        # Extract phone numbers
+                        phones = re.findall(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text)
+                        if phones:
+                            contact_info["phone"] = phones[0]
+                        contact_info["text"] = text.strip()
+
+                self.extracted_data["contact_info"] = contact_info
+
+                # Extract value propositions
+                value_props = []
+                for element in results["value"]:
+                    text = element["text"]
+                    if text and len(text.strip()) > 20 and len(text.strip()) < 200:
+                        value_props.append(text.strip())
+
+                self.extracted_data["value_propositions"] = list(set(value_props))[:10]  # Limit to 10 unique items
+
+                # Get all links for further exploration
+                for link in results["links"]:
+                    href = link["href"]
+                    if href:
+                        full_url = urljoin(self.base_url, href)
+                        if self.is_internal_url(full_url):
+                            self.extracted_data["linked_content"].append({
+                                "url": full_url,
+                                "text": link["text"],
+                                "extracted": False
+                            })
 
-            for selector in amenity_selectors:
-                try:
-                    elements = await page.query_selector_all(selector)
-                    for element in elements:
-                        text = await element.inner_text()
-                        if text and len(text.strip()) > 5 and text not in self.extracted_data["amenities"]:
-                            self.extracted_data["amenities"].append(text.strip())
-                except:
-                    continue
+            except Exception as e:
+                logger.error(f"Error extracting main page: {e}")
 
-            # Extract suite features
-            if 'floorplan' in url.lower() or 'suite' in url.lower():
-                feature_selectors = ['.feature', '.spec', '[class*="spec"]', 'li', 'p']
-                for selector in feature_selectors:
-                    try:
-                        elements = await page.query_selector_all(selector)
-                        for element in elements:
-                            text = await element.inner_text()
-                            if text and len(text.strip()) > 10:
-                                self.extracted_data["suite_features"].append(text.strip())
-                    except:
-                        continue
-
-            # Extract location details
-            if 'location' in url.lower() or 'neighbourhood' in url.lower():
-                location_text = await page.inner_text('body')
-                self.extracted_data["location_details"] = location_text[:2000]  # Limit size
+    async def extract_linked_content(self, context, entries=()):
+        """Render linked pages with the browser, following their links through the frontier"""
+        logger.info("Extracting linked content...")
 
-        except Exception as e:
-            logger.error(f"Error extracting page {url}: {e}")
+        pending = list(entries) + self.frontier.pop_batch()
+        pool = PagePool(context, self.concurrency, new_page=lambda: self.new_page(context))
+        try:
+            while pending:
+                logger.info(f"Crawling {len(pending)} pages with concurrency {self.concurrency}")
+                results = await asyncio.gather(*(self.extract_page_content(pool, entry) for entry in pending))
+
+                # Merge in crawl order so output does not depend on which page finished first
+                for entry, result in zip(pending, results):
+                    if result:
+                        self._merge_page_result(result)
+                        self.frontier.add_links(result["links"], entry)
+                pending = self.frontier.pop_batch()
         finally:
-            await page.close()
+            with self.trace.span("close pool", "browser"):
+                self._page_loads.clear()
+                await pool.close()
+            logger.info(f"Page pool had at most {pool.peak} of {pool.size} pages open")
+
+    async def extract_page_content(self, pool, entry):
+        """Extract content from a frontier page using a page borrowed from the pool"""
+        url = entry.url
+        logger.info(f"Extracting page: {url}")
+        self.page_changes[url] = "rendered"
+        page_type = "pricing" if self.is_pricing_url(url) else "linked"
+        async with pool.page() as page:
+            # Each pooled page gets its own lane in the trace
+            with self.trace.lane(f"page {pool.slot(page)}"), self.trace.span("page", "browser", url=url):
+                try:
+                    await self.navigate(page, url, page_type)
+                    return await self.scrape_page(page, url)
+                except Exception as e:
+                    logger.error(f"Error extracting page {url}: {e}")
+                    return None
+
+    async def scrape_page(self, page, url):
+        """Collect a crawled page's content and links, plus prices on pricing and floor plan pages"""
+        result = await self.scrape_linked_page(page, url)
+        result["pricing"] = await self.scrape_pricing_page(page, url) if self.is_pricing_url(url) else None
+        return result
+
+    async def scrape_linked_page(self, page, url):
+        """Collect amenities, suite features and location text from a loaded page"""
+        result = {
+            "url": url,
+            "amenities": [],
+            "suite_features": [],
+            "location_details": None,
+            "links": []
+        }
+
+        is_suite_page = 'floorplan' in url.lower() or 'suite' in url.lower()
+        is_location_page = 'location' in url.lower() or 'neighbourhood' in url.lower()
 
-    async def extract_media_assets(self, context):
+        spec = {
+            "amenities": {
+                "selectors": ['.amenity', '.amenities', '[class*="amenit"]',
+                              '.feature', '.facility', 'li'],
+                "text": True
+            },
+            "links": {"selectors": ['a[href]'], "attrs": ['href']}
+        }
+        if is_suite_page:
+            spec["suite_features"] = {
+                "selectors": ['.feature', '.spec', '[class*="spec"]', 'li', 'p'],
+                "text": True
+            }
+        if is_location_page:
+            spec["body"] = {"selectors": ['body'], "text": True}
+
+        results = await self.query_page(page, spec)
+
+        # Extract amenities
+        for element in results["amenities"]:
+            text = element["text"]
+            if text and len(text.strip()) > 5:
+                result["amenities"].append(text.strip())
+
+        # Extract suite features
+        if is_suite_page:
+            for element in results["suite_features"]:
+                text = element["text"]
+                if text and len(text.strip()) > 10:
+                    result["suite_features"].append(text.strip())
+
+        # Extract location details
+        if is_location_page and results["body"]:
+            location_text = results["body"][0]["text"]
+            result["location_details"] = location_text[:2000]  # Limit size
+
+        # Keep in-scope links so the next run can continue the crawl from a cached record
+        links = [urljoin(url, link["href"]) for link in results["links"] if link["href"]]
+        result["links"] = [link for link in dict.fromkeys(links) if self.frontier.in_scope(link)]
+
+        return result
+
+    def _merge_page_result(self, result):
+        """Merge one page's extracted content into extracted_data"""
+        self.records.emit("page", {key: value for key, value in result.items() if key != "pricing"}, result["url"])
+        if result["pricing"] is not None:
+            self._merge_pricing_result(result["pricing"])
+        for text in result["amenities"]:
+            if text not in self.extracted_data["amenities"]:
+                self.extracted_data["amenities"].append(text)
+
+        self.extracted_data["suite_features"].extend(result["suite_features"])
+
+        if result["location_details"] is not None:
+            self.extracted_data["location_details"] = result["location_details"]
+
+    async def extract_media_assets(self, context, page=None):
         """Extract images and videos from the website"""
         logger.info("Extracting media assets...")
-        page = await context.new_page()
-
-        try:
-            await page.goto(self.base_url, wait_until='networkidle')
-            await page.wait_for_timeout(2000)
-
-            # Extract images
-            images = await page.query_selector_all('img[src]')
-            for img in images:
-                src = await img.get_attribute('src')
-                alt = await img.get_attribute('alt') or ""
-                if src:
-                    full_src = urljoin(self.base_url, src)
-                    if self.is_valid_media_url(full_src):
-                        self.extracted_data["media_assets"]["images"].append({
+        async with self.landing_page(context, page) as page:
+            try:
+                results = await self.query_page(page, {
+                    "images": {"selectors": ['img[src]'], "attrs": ['src', 'alt']},
+                    "videos": {
+                        "selectors": ['video, [class*="video"], iframe[src*="youtube"], iframe[src*="vimeo"]'],
+                        "attrs": ['src']
+                    }
+                })
+
+                # Extract images
+                for img in results["images"]:
+                    src = img["src"]
+                    alt = img["alt"] or ""
+                    if src:
+                        full_src = urljoin(self.base_url, src)
+                        if self.is_valid_media_url(full_src):
+                            self.extracted_data["media_assets"]["images"].append({
+                                "url": full_src,
+                                "alt": alt,
+                                "category": self.categorize_image(alt, src)
+                            })
+
+                # Extract videos
+                for video in results["videos"]:
+                    src = video["src"]
+                    if src:
+                        full_src = urljoin(self.base_url, src)
+                        self.extracted_data["media_assets"]["videos"].append({
                             "url": full_src,
-                            "alt": alt,
-                            "category": self.categorize_image(alt, src)
+                            "type": "video"
                         })
 
-            # Extract videos
-            videos = await page.query_selector_all('video, [class*="video"], iframe[src*="youtube"], iframe[src*="vimeo"]')
-            for video in videos:
-                if await video.get_attribute('src'):
-                    src = await video.get_attribute('src')
-                    full_src = urljoin(self.base_url, src)
-                    self.extracted_data["media_assets"]["videos"].append({
-                        "url": full_src,
-                        "type": "video"
-                    })
+                # Video players are mounted client-side, so static pages take them from the Nuxt state
+                if isinstance(page, StaticPage):
+                    video_ids = [video_id for state in page.states
+                                 for _, video_id in iter_fields(state, 'vimeoVideoId')]
+                    for video_id in dict.fromkeys(video_ids):
+                        self.extracted_data["media_assets"]["videos"].append({
+                            "url": f"https://player.vimeo.com/video/{video_id}",
+                            "type": "video"
+                        })
 
-        except Exception as e:
-            logger.error(f"Error extracting media assets: {e}")
-        finally:
-            await page.close()
+                # Responsive images list one asset at several sizes; keep one entry per asset
+                for media_type in ("images", "videos"):
+                    media = self.extracted_data["media_assets"][media_type]
+                    media[:] = collapse_variants(media)
 
-    async def extract_documents(self, context):
+            except Exception as e:
+                logger.error(f"Error extracting media assets: {e}")
+
+    async def extract_documents(self, context, page=None):
         """Extract PDF documents and downloads"""
         logger.info("Extracting documents...")
-        page = await context.new_page()
-
-        try:
-            await page.goto(self.base_url, wait_until='networkidle')
-            await page.wait_for_timeout(2000)
-
-            # Find PDF links and downloads
-            doc_links = await page.query_selector_all('a[href$=".pdf"], a[href*="download"], a[href*="brochure"]')
-            for link in doc_links:
-                href = await link.get_attribute('href')
-                text = await link.inner_text()
-                if href:
-                    full_href = urljoin(self.base_url, href)
-                    self.extracted_data["media_assets"]["documents"].append({
-                        "url": full_href,
-                        "title": text.strip(),
-                        "type": "pdf"
-                    })
-
-        except Exception as e:
-            logger.error(f"Error extracting documents: {e}")
-        finally:
-            await page.close()
-
-    async def extract_pricing_floorplans(self, context):
-        """Extract pricing and floor plan information"""
-        logger.info("Extracting pricing and floor plans...")
-
-        pricing_urls = [
-            urljoin(self.base_url, "/prices-floorplans"),
-            urljoin(self.base_url, "/floorplans"),
-            urljoin(self.base_url, "/pricing")
-        ]
-
-        for url in pricing_urls:
-            page = await context.new_page()
+        async with self.landing_page(context, page) as page:
             try:
-                await page.goto(url, wait_until='networkidle')
-                await page.wait_for_timeout(2000)
-
-                # Extract pricing information
-                pricing_text = await page.inner_text('body')
-                price_matches = re.findall(r'\$[\d,]+(?:\.\d{2})?', pricing_text)
-                if price_matches:
-                    self.extracted_data["pricing_floorplans"]["price_ranges"] = {
-                        "found_prices": price_matches[:10]  # Limit to 10
+                # Find PDF links and downloads
+                results = await self.query_page(page, {
+                    "documents": {
+                        "selectors": ['a[href$=".pdf"], a[href*="download"], a[href*="brochure"]'],
+                        "text": True,
+                        "attrs": ['href']
                     }
+                })
+                for link in results["documents"]:
+                    href = link["href"]
+                    text = link["text"]
+                    if href:
+                        full_href = urljoin(self.base_url, href)
+                        self.extracted_data["media_assets"]["documents"].append({
+                            "url": full_href,
+                            "title": text.strip(),
+                            "type": "pdf"
+                        })
 
-                # Extract suite types
-                suite_selectors = ['.suite-type', '.floorplan', '[class*="suite"]', '.unit-type']
-                for selector in suite_selectors:
-                    try:
-                        elements = await page.query_selector_all(selector)
-                        for element in elements:
-                            text = await element.inner_text()
-                            if text and len(text.strip()) > 5:
-                                self.extracted_data["pricing_floorplans"]["suite_types"].append(text.strip())
-                    except:
-                        continue
+                documents = self.extracted_data["media_assets"]["documents"]
+                documents[:] = collapse_variants(documents)
 
             except Exception as e:
-                logger.error(f"Error extracting pricing from {url}: {e}")
-            finally:
-                await page.close()
+                logger.error(f"Error extracting documents: {e}")
+
+    def is_pricing_url(self, url):
+        """Pricing and floor plan pages are also scraped for prices and suite types"""
+        path = urlparse(url).path.lower()
+        return any(hint in path for hint in ('price', 'floorplan', 'floor-plan'))
+
+    async def scrape_pricing_page(self, page, url):
+        """Collect prices and suite types from a loaded pricing page"""
+        result = {"url": url, "found_prices": [], "suite_types": []}
+        results = await self.query_page(page, {
+            "body": {"selectors": ['body'], "text": True},
+            "suite_types": {
+                "selectors": ['.suite-type', '.floorplan', '[class*="suite"]', '.unit-type'],
+                "text": True
+            }
+        })
+
+        # Extract pricing information
+        pricing_text = results["body"][0]["text"] if results["body"] else ""
+        price_matches = re.findall(r'\$[\d,]+(?:\.\d{2})?', pricing_text)
+        if not price_matches and isinstance(page, StaticPage):
+            # Suite prices the server left for the client to render are in the Nuxt state
+            price_matches = [f"${price:,}" for state in page.states
+                             for _, price in iter_fields(state, 'Price') if isinstance(price, (int, float))]
+        result["found_prices"] = price_matches[:10]  # Limit to 10
+
+        # Extract suite types
+        for element in results["suite_types"]:
+            text = element["text"]
+            if text and len(text.strip()) > 5:
+                result["suite_types"].append(text.strip())
+
+        return result
+
+    def _merge_pricing_result(self, result):
+        """Merge one pricing page's extracted content into extracted_data"""
+        self.records.emit("pricing", result, result["url"])
+        if result["found_prices"]:
+            self.extracted_data["pricing_floorplans"]["price_ranges"] = {
+                "found_prices": result["found_prices"]
+            }
+        self.extracted_data["pricing_floorplans"]["suite_types"].extend(result["suite_types"])
 
     def is_internal_url(self, url):
         """Check if URL belongs to the same domain"""
@@ -370,6 +1396,15 @@ class RoyalBayviewExtractor:
         except:
             return False
 
+    def is_first_party_url(self, url):
+        """Check if URL is served from the site's own domain or one of its subdomains"""
+        try:
+            site = '.'.join(urlparse(self.base_url).netloc.split('.')[-2:])
+            host = urlparse(url).netloc
+            return host == site or host.endswith('.' + site)
+        except:
+            return False
+
     def is_valid_media_url(self, url):
         """Check if URL points to a valid media file"""
         try:
@@ -394,10 +1429,59 @@ class RoyalBayviewExtractor:
             return 'general'
 
     def save_results(self):
-        """Save extracted data to JSON file"""
+        """Compact the record stream into the JSON and summary files, then save crawl bookkeeping"""
+        with self.trace.span("write results", "output"):
+            self.compact_results()
+
+        # Record what changed since the previous run, then persist state for the next one
+        with self.trace.span("write change set", "output"):
+            change_set = self.build_change_set()
+            changes_file = self.output_dir / "crawl_changes.json"
+            with open(changes_file, 'w', encoding='utf-8') as f:
+                json.dump(change_set, f, indent=2, ensure_ascii=False)
+        if self.archive_mode == "replay":
+            # A replay serves an old crawl; its state must not become the next live run's baseline
+            logger.info("Replay run: crawl state left unchanged")
+        else:
+            with self.trace.span("write crawl state", "output"):
+                self.save_crawl_state()
+
+        self.save_timing()
+
+        pages = change_set["pages"]
+        logger.info(f"Change set saved to {changes_file}: {len(pages['new'])} new, {len(pages['changed'])} changed, "
+                    f"{len(pages['unchanged'])} unchanged, {len(pages['removed'])} removed pages")
+
+    def save_timing(self):
+        """Write the run stats, the Chrome trace and the per-step timing table"""
+        timing = self.trace.summary()
+        self.run_stats["timing"] = timing
+
+        stats_file = self.output_dir / "crawl_stats.json"
+        with open(stats_file, 'w', encoding='utf-8') as f:
+            json.dump(self.run_stats, f, indent=2, ensure_ascii=False)
+
+        # Open in ui.perfetto.dev or chrome://tracing for a per-page waterfall
+        trace_file = self.output_dir / "crawl_trace.json"
+        self.trace.save(trace_file)
+
+        table = format_summary(timing)
+        timing_file = self.output_dir / "crawl_timing.md"
+        with open(timing_file, 'w', encoding='utf-8') as f:
+            f.write("# Royal Bayview Crawl Timing\n\n")
+            f.write(f"**Run Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(f"**Wall Time**: {self.run_stats.get('wall_time_s', 0)} s\n\n")
+            f.write(table + "\n")
+
+        logger.info(f"Crawl timing by step (trace saved to {trace_file}):\n{table}")
+
+    def compact_results(self):
+        """Build website_content_extraction.json and extraction_summary.md from the record stream"""
+        data = compact_records(self.records.path)
+
         output_file = self.output_dir / "website_content_extraction.json"
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.extracted_data, f, indent=2, ensure_ascii=False)
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
         logger.info(f"Results saved to {output_file}")
 
@@ -407,30 +1491,30 @@ class RoyalBayviewExtractor:
             f.write("# Royal Bayview Website Content Extraction Summary\n\n")
             f.write(f"**Extraction Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             f.write(f"**Website URL**: {self.base_url}\n\n")
-            f.write(f"**Status**: {self.extracted_data['extraction_completeness']}\n\n")
+            f.write(f"**Status**: {data['extraction_completeness']}\n\n")
 
             f.write("## Project Overview\n")
-            f.write(self.extracted_data['project_overview'] or "No overview extracted\n\n")
+            f.write(data['project_overview'] or "No overview extracted\n\n")
 
             f.write("## Key Amenities\n")
-            for amenity in self.extracted_data['amenities'][:10]:
+            for amenity in data['amenities'][:10]:
                 f.write(f"- {amenity}\n")
             f.write("\n")
 
             f.write("## Contact Information\n")
-            contact = self.extracted_data['contact_info']
+            contact = data['contact_info']
             if contact:
                 f.write(f"- Phone: {contact.get('phone', 'Not found')}\n")
                 f.write(f"- Details: {contact.get('text', '')}\n")
             f.write("\n")
 
             f.write("## Media Assets Found\n")
-            f.write(f"- Images: {len(self.extracted_data['media_assets']['images'])}\n")
-            f.write(f"- Videos: {len(self.extracted_data['media_assets']['videos'])}\n")
-            f.write(f"- Documents: {len(self.extracted_data['media_assets']['documents'])}\n\n")
+            f.write(f"- Images: {len(data['media_assets']['images'])}\n")
+            f.write(f"- Videos: {len(data['media_assets']['videos'])}\n")
+            f.write(f"- Documents: {len(data['media_assets']['documents'])}\n\n")
 
             f.write("## Value Propositions\n")
-            for prop in self.extracted_data['value_propositions'][:5]:
+            for prop in data['value_propositions'][:5]:
                 f.write(f"- {prop}\n")
             f.write("\n")
 
@@ -438,7 +1522,34 @@ class RoyalBayviewExtractor:
 
 async def main():
     """Main execution function"""
-    extractor = RoyalBayviewExtractor()
+    parser = argparse.ArgumentParser(description="Extract Royal Bayview website content")
+    parser.add_argument("--backend", choices=["auto", "http", "browser"], default="auto")
+    parser.add_argument("--record", metavar="DIR", help="save every response of this crawl to DIR")
+    parser.add_argument("--replay", metavar="DIR", help="serve the crawl from a recorded DIR, offline")
+    parser.add_argument("--output-dir", help="where results are written (default: output, or DIR/replay_output "
+                                             "with --replay so a replay never overwrites live results)")
+    parser.add_argument("--browser-cache", metavar="DIR",
+                        help="render with a persistent per-site browser cache kept under DIR "
+                             "(turns off resource blocking and --memo-mb, which would bypass it)")
+    parser.add_argument("--browser-cache-mb", type=int, default=500, help="size limit of each site's browser cache")
+    parser.add_argument("--memo-mb", type=float, default=64,
+                        help="memory for reusing content-hashed responses within the crawl (0 disables)")
+    parser.add_argument("--compact", action="store_true",
+                        help="only rebuild the JSON and summary from the existing record stream")
+    args = parser.parse_args()
+
+    archive_mode = "record" if args.record else "replay" if args.replay else None
+    output_dir = args.output_dir or (Path(args.replay) / "replay_output" if args.replay else "output")
+    extractor = RoyalBayviewExtractor(output_dir=output_dir, backend=args.backend, archive_mode=archive_mode,
+                                      archive_dir=args.record or args.replay,
+                                      browser_cache_dir=args.browser_cache, browser_cache_mb=args.browser_cache_mb,
+                                      memo_mb=args.memo_mb)
+    if args.compact:
+        if not extractor.records.path.exists():
+            logger.error(f"No record stream at {extractor.records.path} to compact")
+            return
+        extractor.compact_results()
+        return
     logger.info("Starting Royal Bayview website content extraction...")
 
     try:
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Royal Bayview Extraction Record Stream
+Append-only JSONL stream of extraction records: one line per extracted page, asset or link,
+flushed as soon as it is produced so a crashed crawl keeps everything extracted so far.
+Compaction folds the stream back into the website_content_extraction.json schema.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECORDS_FILENAME = "website_content_records.jsonl"
+
+# media_assets key for each asset record type
+MEDIA_RECORD_TYPES = {"image": "images", "video": "videos", "document": "documents"}
+
+class RecordStream:
+    """Writes one JSON record per line, flushing after each one"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def open(self):
+        """Start a fresh stream for this run"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+
+    def emit(self, record_type, data, url=None):
+        if self._file is None:
+            return
+        record = {
+            "type": record_type,
+            "url": url,
+            "ts": datetime.now().isoformat(),
+            "data": data
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def iter_records(path, types=None):
+    """Lazily yield records from a stream, optionally only those of the given types"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write leaves at most one truncated final line
+                logger.warning(f"Skipping unreadable record at {path}:{line_number}")
+                continue
+            if types is None or record["type"] in types:
+                yield record
+
+def is_complete(path):
+    """Did the run that wrote the stream finish, i.e. is its last record run_end?"""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        # run_end is a short record, so the tail of the file is enough
+        f.seek(max(0, f.tell() - 65536))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if not lines:
+        return False
+    try:
+        return json.loads(lines[-1])["type"] == "run_end"
+    except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+        return False
+
+def compact_records(path):
+    """Fold a record stream into the website_content_extraction.json schema"""
+    data = {
+        "project_overview": "",
+        "location_details": "",
+        "amenities": [],
+        "suite_features": [],
+        "contact_info": {},
+        "value_propositions": [],
+        "media_assets": {
+            "images": [],
+            "videos": [],
+            "documents": []
+        },
+        "pricing_floorplans": {
+            "suite_types": [],
+            "price_ranges": {},
+            "availability": ""
+        },
+        "linked_content": [],
+        "last_updated": datetime.now().isoformat(),
+        "extraction_completeness": "in_progress"
+    }
+    seen_amenities = set()
+
+    for record in iter_records(path):
+        record_type = record["type"]
+        item = record["data"]
+
+        if record_type == "overview":
+            data["project_overview"] = item["project_overview"]
+            data["contact_info"] = item["contact_info"]
+            data["value_propositions"] = item["value_propositions"]
+        elif record_type == "link":
+            data["linked_content"].append(item)
+        elif record_type in MEDIA_RECORD_TYPES:
+            data["media_assets"][MEDIA_RECORD_TYPES[record_type]].append(item)
+        elif record_type == "page":
+            for text in item["amenities"]:
+                if text not in seen_amenities:
+                    seen_amenities.add(text)
+                    data["amenities"].append(text)
+            data["suite_features"].extend(item["suite_features"])
+            if item["location_details"] is not None:
+                data["location_details"] = item["location_details"]
+        elif record_type == "pricing":
+            if item["found_prices"]:
+                data["pricing_floorplans"]["price_ranges"] = {"found_prices": item["found_prices"]}
+            data["pricing_floorplans"]["suite_types"].extend(item["suite_types"])
+        elif record_type == "run_end":
+            data["last_updated"] = item["last_updated"]
+            data["extraction_completeness"] = item["extraction_completeness"]
+
+    return data
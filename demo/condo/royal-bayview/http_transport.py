@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport
+One requests.Session for every download of a run: keep-alive connection pools per host, bounded
+retries with exponential backoff on connection errors, 429 and 5xx responses (honouring
+Retry-After), and separate connect/read timeouts. Counts requests, new connections and retries
+per host, so connection reuse can be checked after a run.
+download() streams a response to disk in large chunks through a .part file, hashing it on the
+way, so memory stays flat whatever the file size.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limiting and transient server or gateway errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Bytes read from the socket and written to disk per call while streaming
+CHUNK_SIZE = 1024 * 1024
+
+def write_stream(response, f, digest=None, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Write a streamed response body to an open file, hashing it on the way; returns bytes written
+
+    on_chunk(size) is called after each chunk is written and flushed, e.g. to record progress.
+    """
+    size = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        f.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        size += len(chunk)
+        if on_chunk is not None:
+            # Flushed first, so recorded progress never runs ahead of the data on disk
+            f.flush()
+            on_chunk(len(chunk))
+    return size
+
+def _host_label(host, port):
+    return host if port in (None, 80, 443) else f"{host}:{port}"
+
+def _counting_pool_classes(on_connect):
+    """urllib3 pool classes whose connections call on_connect(host) for every socket they open
+
+    The pools' own num_connections misses a dropped keep-alive connection being reopened.
+    """
+    def counting(connection_cls):
+        class CountingConnection(connection_cls):
+            def connect(self):
+                super().connect()
+                on_connect(_host_label(self.host, self.port))
+        return CountingConnection
+
+    return {
+        "http": type("CountingHTTPConnectionPool", (HTTPConnectionPool,),
+                     {"ConnectionCls": counting(HTTPConnection)}),
+        "https": type("CountingHTTPSConnectionPool", (HTTPSConnectionPool,),
+                      {"ConnectionCls": counting(HTTPSConnection)})
+    }
+
+class HttpTransport:
+    """Pooled, retrying HTTP GETs with per-host connection reuse statistics"""
+
+    def __init__(self, pool_size=10, max_hosts=20, retries=3, backoff=0.5, connect_timeout=10,
+                 read_timeout=30):
+        self.timeout = (connect_timeout, read_timeout)
+        self._lock = threading.Lock()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods={"GET", "HEAD"},
+            respect_retry_after_header=True,
+            # Hand the last response back instead of raising, so callers see the real status
+            raise_on_status=False
+        )
+        # max_hosts pools are kept alive at once, each holding up to pool_size connections
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=pool_size, max_retries=retry)
+        adapter.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self._on_connect)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+        # Host -> {"requests", "retries", "errors"}, as seen by callers
+        self.hosts = {}
+        # Host -> sockets opened
+        self.connections = {}
+
+    def _on_connect(self, host):
+        with self._lock:
+            self.connections[host] = self.connections.get(host, 0) + 1
+
+    def _host_stats(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            return self.hosts.setdefault(host, {"requests": 0, "retries": 0, "errors": 0})
+
+    def get(self, url, **kwargs):
+        """GET url through the shared pools; use as a context manager when streaming"""
+        kwargs.setdefault("timeout", self.timeout)
+        stats = self._host_stats(url)
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                stats["requests"] += 1
+                stats["errors"] += 1
+            raise
+
+        retries = getattr(response.raw, "retries", None)
+        with self._lock:
+            stats["requests"] += 1
+            stats["retries"] += len(retries.history) if retries is not None else 0
+            if response.status_code >= 400:
+                stats["errors"] += 1
+        return response
+
+    def download(self, url, path, chunk_size=CHUNK_SIZE):
+        """Stream url to path and return its sha256, size and content type
+
+        The body goes to <path>.part, renamed over path only once complete, so path never holds
+        a truncated file.
+        """
+        path = Path(path)
+        part = path.with_name(path.name + ".part")
+        digest = hashlib.sha256()
+        try:
+            with self.get(url, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type")
+                with open(part, 'wb') as f:
+                    size = write_stream(response, f, digest, chunk_size)
+            os.replace(part, path)
+        except BaseException:
+            part.unlink(missing_ok=True)
+            raise
+        return {"sha256": digest.hexdigest(), "bytes": size, "content_type": content_type}
+
+    def connection_stats(self):
+        """Per host: requests sent, connections opened and the share of requests on a reused connection"""
+        stats = {host: dict(values) for host, values in self.hosts.items()}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            entry = stats.setdefault(_host_label(pool.host, pool.port), {"requests": 0, "retries": 0, "errors": 0})
+            # Counted by urllib3, so retried attempts and redirects are included
+            entry["attempts"] = entry.get("attempts", 0) + pool.num_requests
+        for host, opened in self.connections.items():
+            stats.setdefault(host, {"requests": 0, "retries": 0, "errors": 0})["connections"] = opened
+        for entry in stats.values():
+            attempts = entry.get("attempts", 0)
+            entry["reuse_rate"] = round(1 - entry.get("connections", 0) / attempts, 3) if attempts else 0
+        return stats
+
+    def log_stats(self):
+        for host, entry in sorted(self.connection_stats().items()):
+            logger.info(f"{host}: {entry['requests']} requests over {entry.get('connections', 0)} connections "
+                        f"({entry['reuse_rate']:.0%} reused), {entry['retries']} retries, {entry['errors']} errors")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Royal Bayview Media Inventory
+Builds the download inventory from completion events instead of rescanning the media folders.
+Every finished file reports its URL, SHA-256, size, content type and download time once; the
+events are appended to download_events.jsonl as they happen and folded into inventory.json and
+media_inventory.json when the run ends.
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from extraction_records import RecordStream
+
+logger = logging.getLogger(__name__)
+
+EVENTS_FILENAME = "download_events.jsonl"
+
+# Inventory sections, one per media folder
+KINDS = ("images", "videos", "documents", "pages")
+
+class MediaInventory:
+    """Thread-safe collector of download completion events"""
+
+    def __init__(self, media_dir, output_dir):
+        self.media_dir = Path(media_dir)
+        self.output_dir = Path(output_dir)
+        self.events = []
+        # Print image filename -> {rendition name: details}
+        self.renditions = {}
+        self._lock = threading.Lock()
+        self.stream = RecordStream(self.media_dir / EVENTS_FILENAME)
+        self.stream.open()
+
+    def record(self, kind, path, url, sha256, size, content_type=None, elapsed_ms=None, **details):
+        """Log one finished file and return its event"""
+        path = Path(path)
+        event = {
+            "kind": kind,
+            "filename": path.name,
+            "path": str(path),
+            "url": url,
+            "sha256": sha256,
+            "bytes": size,
+            "content_type": content_type,
+            "elapsed_ms": elapsed_ms,
+            **details
+        }
+        with self._lock:
+            self.events.append(event)
+            self.stream.emit(kind, event, url=url)
+        return event
+
+    def add_renditions(self, filename, renditions):
+        with self._lock:
+            self.renditions[filename] = renditions
+
+    def is_rendition(self, event):
+        """Is the event a web or thumbnail rendition, listed under its print file?"""
+        return event.get("rendition") not in (None, "print")
+
+    def totals(self):
+        """Listed files and renditions, counted separately so total_files matches the lists"""
+        return {
+            "total_files": sum(1 for event in self.events if not self.is_rendition(event)),
+            "total_renditions": sum(1 for event in self.events if self.is_rendition(event))
+        }
+
+    def files(self, kind):
+        """Events of one section in filename order; renditions are listed under their print file"""
+        return sorted((event for event in self.events
+                       if event["kind"] == kind and not self.is_rendition(event)),
+                      key=lambda event: event["filename"])
+
+    def build(self, rendition_specs=None, extra=None):
+        """inventory.json content"""
+        inventory = {
+            "download_date": datetime.now().isoformat(),
+            **self.totals(),
+            # Every file written this run, renditions included
+            "total_bytes": sum(event["bytes"] for event in self.events),
+            **{kind: [] for kind in KINDS}
+        }
+        if rendition_specs is not None:
+            inventory["image_renditions"] = rendition_specs
+        for kind in KINDS:
+            for event in self.files(kind):
+                entry = {
+                    "filename": event["filename"],
+                    "path": event["path"],
+                    "size": event["bytes"],
+                    "url": event["url"],
+                    "sha256": event["sha256"],
+                    "content_type": event["content_type"],
+                    "elapsed_ms": event["elapsed_ms"]
+                }
+                if event["filename"] in self.renditions:
+                    entry["renditions"] = self.renditions[event["filename"]]
+                inventory[kind].append(entry)
+        inventory.update(extra or {})
+        return inventory
+
+    def build_summary(self):
+        """media_inventory.json content: sizes in KB and paths relative to the output folder"""
+        summary = {"download_date": datetime.now().isoformat(), **self.totals()}
+        for kind in KINDS:
+            summary[kind] = [{
+                "filename": event["filename"],
+                "size_kb": round(event["bytes"] / 1024, 1),
+                "path": str(Path(event["path"]).relative_to(self.output_dir))
+                        if Path(event["path"]).is_relative_to(self.output_dir) else event["path"]
+            } for event in self.files(kind)]
+        return summary
+
+    def save(self, rendition_specs=None, extra=None):
+        """Write inventory.json and media_inventory.json and close the event log"""
+        self.stream.close()
+        inventory = self.build(rendition_specs, extra)
+        for filename, content in (("inventory.json", inventory), ("media_inventory.json", self.build_summary())):
+            with open(self.media_dir / filename, 'w', encoding='utf-8') as f:
+                json.dump(content, f, indent=2, ensure_ascii=False)
+        logger.info(f"Inventory created with {inventory['total_files']} files and "
+                    f"{inventory['total_renditions']} renditions ({inventory['total_bytes'] / 1048576:.1f} MB) "
+                    f"from {EVENTS_FILENAME}")
+        return inventory
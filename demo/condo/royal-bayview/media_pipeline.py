@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Royal Bayview Extract-and-Download Pipeline
+Runs the content extractor and the media downloader together: every image, video and document
+the extractor finds goes straight onto a queue, and the downloader fetches it while the crawl
+continues. Saved HTML pages follow as soon as the crawl ends, so the end-to-end time approaches
+the longer of the crawl and the downloads rather than their sum.
+"""
+
+import argparse
+import asyncio
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+
+from download_media import RoyalBayviewMediaDownloader
+from download_metrics import format_table
+from extract_website_content import RoyalBayviewExtractor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+async def run_pipeline(base_url="https://www.tridel.com/royalbayview/", output_dir="output",
+                       extractor_options=None, downloader_options=None):
+    """Crawl and download concurrently and return both results with their timings"""
+    media_queue = queue.Queue()
+    extractor = RoyalBayviewExtractor(base_url=base_url, output_dir=output_dir, media_queue=media_queue,
+                                      **(extractor_options or {}))
+    downloader = RoyalBayviewMediaDownloader(json_file=Path(output_dir) / "website_content_extraction.json",
+                                             output_dir=output_dir, base_url=base_url,
+                                             **(downloader_options or {}))
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    # A thread of its own, so the downloader never holds one of the extractor's fetch threads
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="downloader") as executor:
+        download = loop.run_in_executor(executor, downloader.download_all_media, media_queue)
+        try:
+            await extractor.extract_website_content()
+            extractor.save_results()
+        finally:
+            crawl_s = time.perf_counter() - start
+            # extract_website_content always ends the queue; results are awaited either way
+            results = await download
+    wall_s = time.perf_counter() - start
+
+    download_s = results["throughput"]["wall_time_s"]
+    timing = {
+        "crawl_s": round(crawl_s, 3),
+        # From the first download job to the last one finishing
+        "download_s": download_s,
+        "end_to_end_s": round(wall_s, 3),
+        "sequential_estimate_s": round(crawl_s + download_s, 3),
+        "overlap_s": round(max(0.0, crawl_s + download_s - wall_s), 3)
+    }
+    logger.info(f"Pipeline finished in {timing['end_to_end_s']} s: crawl {timing['crawl_s']} s, downloads "
+                f"{timing['download_s']} s, {timing['overlap_s']} s overlapped")
+    return {"extraction": extractor.run_stats, "downloads": results, "timing": timing}
+
+async def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Extract a project's content and download its media in one pass")
+    parser.add_argument("--base-url", default="https://www.tridel.com/royalbayview/")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--backend", choices=["auto", "http", "browser"], default="auto")
+    parser.add_argument("--workers", type=int, default=8, help="parallel downloads")
+    parser.add_argument("--host-limit", type=int, default=4, help="downloads in flight per host")
+    args = parser.parse_args()
+
+    result = await run_pipeline(args.base_url, args.output_dir, extractor_options={"backend": args.backend},
+                                downloader_options={"workers": args.workers, "host_limit": args.host_limit})
+
+    downloads = result["downloads"]
+    timing = result["timing"]
+    print("\n" + "=" * 50)
+    print("ROYAL BAYVIEW PIPELINE SUMMARY")
+    print("=" * 50)
+    print(f"Images: {downloads['images']}, videos: {downloads['videos']}, documents: {downloads['documents']}, "
+          f"pages: {downloads['pages']}")
+    print(f"Crawl: {timing['crawl_s']} s, downloads: {timing['download_s']} s")
+    print(f"End to end: {timing['end_to_end_s']} s (sequential: ~{timing['sequential_estimate_s']} s)")
+    print("=" * 50)
+    print(format_table(downloads['metrics']))
+    print("=" * 50)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Nuxt Payload Decoder
+Decodes the serialized state Nuxt ships with statically generated pages (state.js,
+payload.js or an inline window.__NUXT__ script) into plain Python objects, without a browser.
+
+The state is written by devalue as a single function call:
+    (function(a,b,...){a.x={...};...;return {...}}("arg", 1, {}, ...))
+Only that subset of JavaScript is understood: literals, objects, arrays, parameter
+references, member assignments on parameters and a final return statement.
+"""
+
+import re
+from urllib.parse import urljoin
+
+# Tokens: strings, numbers, identifiers and single-character punctuation
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_$][\w$]*)
+      | (?P<punct>[{}\[\](),:;=.!-])
+    )''', re.VERBOSE)
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+# How each kind of Nuxt state script begins
+STATE_PREFIXES = ('window.__NUXT__=', '__NUXT_JSONP__(')
+
+class NuxtPayloadError(ValueError):
+    """Raised when a script does not hold a Nuxt state this decoder understands"""
+
+def _unescape(literal):
+    body = literal[1:-1]
+    if '\\' not in body:
+        return body
+
+    out = []
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != '\\':
+            out.append(char)
+            i += 1
+            continue
+        escape = body[i + 1]
+        if escape == 'u':
+            if body[i + 2] == '{':
+                end = body.index('}', i)
+                out.append(chr(int(body[i + 3:end], 16)))
+                i = end + 1
+            else:
+                code = int(body[i + 2:i + 6], 16)
+                i += 6
+                # Characters outside the BMP are escaped as a UTF-16 pair (\uD83D\uDE00)
+                if 0xD800 <= code <= 0xDBFF and body[i:i + 2] == '\\u':
+                    low = int(body[i + 2:i + 6], 16)
+                    if 0xDC00 <= low <= 0xDFFF:
+                        code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                        i += 6
+                # A lone surrogate cannot be written as UTF-8
+                out.append('\ufffd' if 0xD800 <= code <= 0xDFFF else chr(code))
+        elif escape == 'x':
+            out.append(chr(int(body[i + 2:i + 4], 16)))
+            i += 4
+        else:
+            out.append(ESCAPES.get(escape, escape))
+            i += 2
+    return ''.join(out)
+
+def _tokenize(source):
+    tokens = []
+    pos = 0
+    end = len(source.rstrip())
+    while pos < end:
+        match = TOKEN_RE.match(source, pos)
+        if not match:
+            raise NuxtPayloadError(f"Unexpected character at offset {pos}: {source[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.scope = {}
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        kind, token = self.next()
+        if token != value:
+            raise NuxtPayloadError(f"Expected {value!r}, got {token!r}")
+
+    def accept(self, value):
+        if self.peek()[1] == value:
+            self.pos += 1
+            return True
+        return False
+
+    def parse_call(self):
+        """(function(params){body}(args)) -> value returned by body"""
+        self.expect('(')
+        self.expect('function')
+        self.expect('(')
+        params = []
+        while not self.accept(')'):
+            params.append(self.next()[1])
+            self.accept(',')
+
+        self.expect('{')
+        body_start = self.pos
+        depth = 1
+        while depth:
+            kind, token = self.next()
+            if token is None:
+                raise NuxtPayloadError("Unterminated function body")
+            if kind == 'punct' and token == '{':
+                depth += 1
+            elif kind == 'punct' and token == '}':
+                depth -= 1
+        body_end = self.pos - 1
+
+        # Arguments are evaluated before the body runs, so bind them first
+        self.expect('(')
+        args = []
+        while not self.accept(')'):
+            args.append(self.parse_value())
+            self.accept(',')
+        self.accept(')')
+        self.scope = dict(zip(params, args + [None] * (len(params) - len(args))))
+
+        after_args = self.pos
+        self.pos = body_start
+        result = self.parse_body(body_end)
+        self.pos = after_args
+        return result
+
+    def parse_body(self, body_end):
+        while self.pos < body_end:
+            if self.accept(';'):
+                continue
+            if self.accept('return'):
+                return self.parse_value()
+            self.parse_assignment()
+        return None
+
+    def parse_assignment(self):
+        """name.member[.member...]=value"""
+        target = self.scope[self.next()[1]]
+        keys = []
+        while self.accept('.'):
+            keys.append(self.next()[1])
+        if not keys:
+            raise NuxtPayloadError("Only member assignments are supported")
+        self.expect('=')
+        value = self.parse_value()
+        for key in keys[:-1]:
+            target = target[key]
+        target[keys[-1]] = value
+
+    def parse_value(self):
+        kind, token = self.next()
+        if kind == 'string':
+            return _unescape(token)
+        if kind == 'number':
+            return int(token) if token.lstrip('-').isdigit() else float(token)
+        if kind == 'name':
+            if token == 'true':
+                return True
+            if token == 'false':
+                return False
+            if token == 'null':
+                return None
+            if token == 'void':
+                self.next()
+                return None
+            if token == 'undefined':
+                return None
+            if token not in self.scope:
+                raise NuxtPayloadError(f"Unknown identifier {token!r}")
+            return self.scope[token]
+        if token == '!':
+            # Minifiers write !0 / !1 for true / false
+            return not self.parse_value()
+        if token == '-':
+            return -self.parse_value()
+        if token == '{':
+            return self.parse_object()
+        if token == '[':
+            return self.parse_array()
+        if token == '(':
+            self.pos -= 1
+            return self.parse_call()
+        raise NuxtPayloadError(f"Unexpected token {token!r}")
+
+    def parse_object(self):
+        result = {}
+        while not self.accept('}'):
+            kind, key = self.next()
+            if kind == 'string':
+                key = _unescape(key)
+            self.expect(':')
+            result[key] = self.parse_value()
+            self.accept(',')
+        return result
+
+    def parse_array(self):
+        result = []
+        while not self.accept(']'):
+            result.append(self.parse_value())
+            self.accept(',')
+        return result
+
+def decode_nuxt_state(script):
+    """Decode a state.js/payload.js body or inline __NUXT__ script into Python objects"""
+    script = script.strip()
+    if not script.startswith(STATE_PREFIXES):
+        raise NuxtPayloadError("Script does not start with a Nuxt state assignment")
+
+    if script.startswith('window.__NUXT__='):
+        expression = script[len('window.__NUXT__='):].rstrip(';')
+    else:
+        # __NUXT_JSONP__("/route", (function(...){...}(...)));
+        expression = script[script.index(',') + 1:].rstrip(';').rstrip()
+        if not expression.endswith(')'):
+            raise NuxtPayloadError("Malformed __NUXT_JSONP__ call")
+        expression = expression[:-1]
+
+    parser = _Parser(_tokenize(expression))
+    if parser.peek()[1] == '(':
+        return parser.parse_call()
+    return parser.parse_value()
+
+def find_state_urls(soup, page_url):
+    """Return absolute URLs of the payload.js and state.js scripts a page references"""
+    urls = []
+    for tag in soup.find_all(['script', 'link']):
+        src = tag.get('src') or tag.get('href')
+        if src and src.split('?')[0].rsplit('/', 1)[-1] in ('payload.js', 'state.js'):
+            urls.append(urljoin(page_url, src))
+    # The per-route payload carries the page data, so prefer it over the global state
+    return sorted(dict.fromkeys(urls), key=lambda url: 'state.js' in url)
+
+def find_inline_state(soup):
+    """Return the inline window.__NUXT__ script of a server-rendered page, if any"""
+    for script in soup.find_all('script', src=False):
+        text = script.string or ''
+        if text.lstrip().startswith(STATE_PREFIXES):
+            return text
+    return None
+
+def iter_fields(state, key):
+    """Yield (fields dict, value) for every Contentful entry whose fields contain key"""
+    seen = set()
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        if isinstance(node, dict):
+            if key in node and node[key] not in (None, ''):
+                yield node, node[key]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
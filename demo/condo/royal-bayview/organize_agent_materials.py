@@ -172,9 +172,18 @@ class RoyalBayviewMediaOrganizer:
         return organized
 
     def create_thumbnails_placeholder(self, structure):
-        """Create thumbnail placeholder information"""
+        """Copy the downloaded thumbnail renditions, documenting any images still without one"""
         logger.info("Creating thumbnail organization info...")
 
+        # The downloader fetches 300x200 thumbnails from the Contentful Images API
+        rendered_dir = self.media_dir / "images" / "thumbnails"
+        copied = []
+        if rendered_dir.exists():
+            for thumb in sorted(rendered_dir.glob("*")):
+                if thumb.is_file():
+                    shutil.copy2(thumb, structure["thumbnails"] / thumb.name)
+                    copied.append(thumb.name)
+
         thumbnail_info = {
             "thumbnail_specs": {
                 "size": "300x200px",
@@ -182,14 +191,18 @@ class RoyalBayviewMediaOrganizer:
                 "quality": "85%",
                 "purpose": "Gallery views and quick loading"
             },
+            "thumbnails": copied,
             "source_images": list(structure["hero_images"].glob("*.jpg")),
-            "recommendation": "Use image processing library (PIL/Pillow) to create thumbnails"
+            "recommendation": ("Thumbnails are server-side renditions from download_media.py; re-run it "
+                               "for images without one" if copied else
+                               "Run download_media.py to fetch thumbnail renditions from the Contentful Images API")
         }
 
         thumbnail_file = structure["thumbnails"] / "thumbnail_requirements.json"
         with open(thumbnail_file, 'w', encoding='utf-8') as f:
             json.dump(thumbnail_info, f, indent=2, default=str)
 
+        logger.info(f"Copied {len(copied)} thumbnails")
         return thumbnail_info
 
     def create_presentation_readme(self, structure, analysis):
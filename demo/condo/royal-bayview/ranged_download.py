@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Resumable Ranged Downloads
+Downloads large files (brochures, videos) so that a failure never starts over from byte zero.
+The body is written to <file>.part and progress to <file>.part.json, in a directory apart from
+the finished files; a later attempt, in this run or the next, asks for the missing bytes with
+Range and If-Range, and starts again only if the server's copy has changed. A server without a
+strong validator gets one plain stream that cannot be resumed. Files above a size threshold on
+servers that accept ranges are split into segments fetched over parallel connections, as many
+as the host has free request slots. Bodies are written by the transport's streaming writer; a
+file fetched as one stream is hashed as it arrives, a split one with a single read once its
+segments are complete.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+import logging
+
+import requests
+
+from http_transport import CHUNK_SIZE, write_stream
+
+logger = logging.getLogger(__name__)
+
+class RangeNotHonoured(Exception):
+    """The server answered a ranged request with the whole file (no range support, or changed file)"""
+
+def _total_size(response):
+    """Full size of the file behind a 200 or 206 response, if the server says"""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) if response.status_code == 200 and length and length.isdigit() else None
+
+def _validator(response):
+    """Value If-Range may carry for this response: a strong ETag, else Last-Modified, else None
+
+    A weak ETag (W/"...") is not allowed in If-Range; a server following the RFC answers such a
+    ranged request with the whole file every time.
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+def _split(total, count):
+    """[start, end, done] byte ranges covering total bytes in count near-equal segments"""
+    size = -(-total // count)
+    return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+class RangedDownload:
+    """One file fetched through an HttpTransport, resumable and optionally split into segments"""
+
+    def __init__(self, transport, url, path, split_above=8 * 1024 * 1024, segments=4, attempts=3, slots=None,
+                 partial_dir=None):
+        self.transport = transport
+        self.url = url
+        self.path = Path(path)
+        # Unfinished bodies and their state live apart from finished files when partial_dir is
+        # given, so nothing that copies the download folders picks them up
+        partial_dir = Path(partial_dir) if partial_dir else self.path.parent
+        partial_dir.mkdir(parents=True, exist_ok=True)
+        self.part = partial_dir / (self.path.name + ".part")
+        self.state_file = partial_dir / (self.path.name + ".part.json")
+        self.split_above = split_above
+        self.segments = segments
+        # Tries per call; each one continues from the bytes already on disk
+        self.attempts = attempts
+        # slots(wanted) -> context manager yielding how many extra connections the host allows
+        # right now (DownloadEngine.extra_host_slots); None lets every segment run at once
+        self.slots = slots
+        self.state = None
+        self.content_type = None
+        # Running hash of a file fetched as one sequential stream; None for a split file
+        self._digest = None
+        self._lock = threading.Lock()
+        self.stats = {"resumed_bytes": 0, "restarts": 0, "segments": 1, "connections": 1}
+
+    def load_state(self):
+        """Progress left by an earlier attempt at the same URL, or None"""
+        if not (self.part.exists() and self.state_file.exists()):
+            return None
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable download state {self.state_file}: {e}")
+            return None
+        if state.get("url") != self.url or self.part.stat().st_size != state.get("total"):
+            return None
+        if not state.get("validator"):
+            # Without a validator there is no telling whether the bytes on disk are still current
+            return None
+        return state
+
+    def save_state(self):
+        with self._lock:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+
+    def discard(self):
+        self.part.unlink(missing_ok=True)
+        self.state_file.unlink(missing_ok=True)
+        self.state = None
+        self._digest = None
+
+    def run(self):
+        """Download the file and return its sha256, size and content type"""
+        self.state = self.load_state()
+        if self.state is not None:
+            done = sum(segment[2] for segment in self.state["segments"])
+            self.stats["resumed_bytes"] = done
+            logger.info(f"Resuming {self.url} at {done}/{self.state['total']} bytes")
+
+        for attempt in range(1, self.attempts + 1):
+            try:
+                if self.state is None and self.start():
+                    break
+                self.fetch_segments()
+                break
+            except RangeNotHonoured:
+                logger.info(f"Server sent the whole file for a range of {self.url}; starting over")
+                self.stats["restarts"] += 1
+                self.stats["resumed_bytes"] = 0
+                self.discard()
+            except (requests.RequestException, OSError) as e:
+                if self.state is None:
+                    # Nothing resumable was written
+                    self.part.unlink(missing_ok=True)
+                    raise
+                if attempt == self.attempts:
+                    # Kept for the next run to resume
+                    raise
+                self.stats["resumed_bytes"] += sum(segment[2] for segment in self.state["segments"])
+                logger.warning(f"Download of {self.url} interrupted ({e}); resuming (attempt {attempt + 1})")
+        else:
+            raise RuntimeError(f"Gave up on {self.url} after {self.attempts} attempts")
+
+        os.replace(self.part, self.path)
+        self.state_file.unlink(missing_ok=True)
+        return self.result()
+
+    def start(self):
+        """First request for the file; True if it fetched the whole body itself"""
+        with self.transport.get(self.url, stream=True, headers={"Range": "bytes=0-"}) as response:
+            response.raise_for_status()
+            total = _total_size(response)
+            self.content_type = response.headers.get("Content-Type")
+            validator = _validator(response)
+            if response.status_code != 206 or not total or not validator:
+                # No range support, or no validator to resume or split safely with: one plain
+                # stream that cannot be resumed
+                self._digest = hashlib.sha256()
+                self.stream(response, 0, None)
+                return True
+
+            count = self.segments if total > self.split_above else 1
+            self.state = {
+                "url": self.url,
+                "validator": validator,
+                "content_type": self.content_type,
+                "total": total,
+                "segments": _split(total, count)
+            }
+            # Sized up front so every segment writes at its own offset
+            with open(self.part, 'wb') as f:
+                f.truncate(total)
+            self.save_state()
+            if count > 1:
+                return False
+            self._digest = hashlib.sha256()
+            self.stream(response, 0, self.state["segments"][0])
+            return True
+
+    def fetch_segments(self):
+        """Fetch every unfinished segment, in parallel when there are several"""
+        self.content_type = self.state.get("content_type")
+        pending = [segment for segment in self.state["segments"] if segment[0] + segment[2] <= segment[1]]
+        self.stats["segments"] = len(self.state["segments"])
+        if not pending:
+            return
+        if len(self.state["segments"]) == 1:
+            # One sequential stream: hash the bytes already on disk, then the rest as it arrives
+            self._digest = self.hash_part(pending[0][2])
+            self.fetch_segment(pending[0])
+            return
+
+        # The caller holds one of the host's slots; further connections need free ones
+        with (self.slots(len(pending) - 1) if self.slots else nullcontext(len(pending) - 1)) as extra:
+            self.stats["connections"] = 1 + extra
+            if not extra:
+                for segment in pending:
+                    self.fetch_segment(segment)
+                return
+            with ThreadPoolExecutor(max_workers=1 + extra, thread_name_prefix="segment") as executor:
+                for future in [executor.submit(self.fetch_segment, segment) for segment in pending]:
+                    future.result()
+
+    def fetch_segment(self, segment):
+        start, end, done = segment
+        # The server sends the whole file instead of the range if its copy has changed
+        headers = {"Range": f"bytes={start + done}-{end}", "If-Range": self.state["validator"]}
+        with self.transport.get(self.url, stream=True, headers=headers) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise RangeNotHonoured(self.url)
+            self.stream(response, start + done, segment)
+
+    def stream(self, response, offset, segment):
+        """Write the response body at offset, recording progress on segment"""
+        mode = 'r+b' if segment is not None else 'wb'
+
+        def progress(size):
+            with self._lock:
+                segment[2] += size
+            self.save_state()
+
+        with open(self.part, mode) as f:
+            f.seek(offset)
+            write_stream(response, f, self._digest, on_chunk=progress if segment is not None else None)
+
+    def hash_part(self, length):
+        """Hash of the first length bytes of the .part file"""
+        digest = hashlib.sha256()
+        with open(self.part, 'rb') as f:
+            while length > 0:
+                chunk = f.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                length -= len(chunk)
+        return digest
+
+    def result(self):
+        """sha256, size and content type of the finished file"""
+        if self._digest is None:
+            # Segments arrive out of order, so a split file is hashed in one read at the end
+            self._digest = hashlib.sha256()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    self._digest.update(chunk)
+        return {"sha256": self._digest.hexdigest(), "bytes": self.path.stat().st_size,
+                "content_type": self.content_type, **self.stats}